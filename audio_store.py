@@ -0,0 +1,359 @@
+"""
+Bounded-disk retention of captured answer audio.
+
+Each answer's audio is stored as compact 16 kHz mono int16 PCM, appended to a
+per-session segment file that is memory-mapped for reads. A sidecar JSON
+index next to each segment (<session_id>.json) records where every answer
+lives, so stored audio survives a restart and can be read by any process
+sharing the directory.
+
+A global byte budget caps the total size of all segments in the directory,
+whichever process wrote them. It is enforced from what is on disk: when it
+is exceeded, whole sessions are evicted in least-recently-used order (by
+segment modification time; reads touch the segment). Segments left without
+an index for ORPHAN_GRACE_SECONDS are orphans from an interrupted write and
+are removed; younger ones may be another process's first answer and are left
+alone.
+
+Segments are opened on demand: a write opens the file for just that append,
+and reads map it. At most max_open_segments stay mapped, so the number of
+open handles does not grow with the number of retained sessions.
+
+Audio is keyed by (session_id, q_num), matching the "q_num" of the
+consultation's response_data entries. get() returns a memoryview into the
+mapped segment, so replaying stored audio does not copy it.
+"""
+import json
+import mmap
+import os
+import threading
+import time
+from collections import OrderedDict
+
+SAMPLE_WIDTH = 2  # int16
+SEGMENT_SUFFIX = ".pcm"
+INDEX_SUFFIX = ".json"
+# Segments mapped for reads at once, per store; the least recently used are unmapped
+MAX_OPEN_SEGMENTS = 32
+# A segment gets its index right after its first answer is written, so only
+# one older than this without an index is an orphan
+ORPHAN_GRACE_SECONDS = 300
+
+class _Segment:
+    """Append-only audio file for one session, memory-mapped while it is being read"""
+
+    def __init__(self, path, index=None, size=0, index_mtime=None):
+        self.path = path
+        self.index_path = path[:-len(SEGMENT_SUFFIX)] + INDEX_SUFFIX
+        self.index = index or {}  # q_num -> (offset, length, sample_rate)
+        self.size = size
+        self.index_mtime = index_mtime
+        self._map = None
+        self._mapped_size = 0
+
+    @classmethod
+    def load(cls, path):
+        """The indexed segment stored at path, or None if it has no index yet"""
+        index_path = path[:-len(SEGMENT_SUFFIX)] + INDEX_SUFFIX
+        try:
+            index_mtime = os.stat(index_path).st_mtime_ns
+            with open(index_path, encoding="utf-8") as f:
+                entries = json.load(f)
+            size = os.path.getsize(path)
+        except FileNotFoundError:
+            # Not indexed yet - possibly another process writing its first answer
+            return None
+        # Entries past the end of the file were indexed but never fully written
+        index = {int(q_num): tuple(entry) for q_num, entry in entries.items()
+                 if entry[0] + entry[1] <= size}
+        return cls(path, index, size, index_mtime)
+
+    def append(self, frames):
+        # Never truncate: the file may hold bytes another process is indexing
+        fd = os.open(self.path, os.O_WRONLY | os.O_CREAT, 0o644)
+        try:
+            offset = self.size
+            os.pwrite(fd, frames, offset)
+        finally:
+            os.close(fd)
+        self.size += len(frames)
+        return offset
+
+    def save_index(self):
+        """Write the sidecar index atomically, after the frames it points to"""
+        tmp_path = f"{self.index_path}.{os.getpid()}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump({str(q_num): list(entry) for q_num, entry in self.index.items()}, f)
+        os.replace(tmp_path, self.index_path)
+        self.index_mtime = os.stat(self.index_path).st_mtime_ns
+
+    def on_disk(self):
+        return os.path.exists(self.path) and os.path.exists(self.index_path)
+
+    def is_stale(self):
+        """True if another process has rewritten the index since it was read"""
+        try:
+            return os.stat(self.index_path).st_mtime_ns != self.index_mtime
+        except FileNotFoundError:
+            return True
+
+    @property
+    def is_mapped(self):
+        return self._map is not None
+
+    def view(self, offset, length):
+        if offset + length > self._mapped_size:
+            # Not mapped yet, or the segment grew since it was mapped. Any views
+            # handed out keep the old mapping alive until they are released.
+            self.unmap()
+            with open(self.path, "rb") as f:
+                self._map = mmap.mmap(f.fileno(), self.size, access=mmap.ACCESS_READ)
+            self._mapped_size = self.size
+        return memoryview(self._map)[offset:offset + length]
+
+    def unmap(self):
+        if self._map is not None:
+            try:
+                self._map.close()
+            except BufferError:
+                # A caller still holds a view; the mapping is released with it
+                pass
+            self._map = None
+            self._mapped_size = 0
+
+    def close(self, remove=True):
+        self.unmap()
+        if remove:
+            _remove_files(self.path, self.index_path)
+
+def _remove_files(*paths):
+    for path in paths:
+        try:
+            os.remove(path)
+        except FileNotFoundError:
+            pass
+        except OSError as e:
+            print(f"⚠️ Could not remove audio file {path}: {e}")
+
+def list_sessions(root_dir):
+    """Session ids with indexed audio in a store directory"""
+    if not os.path.isdir(root_dir):
+        return []
+    names = set(os.listdir(root_dir))
+    return sorted(name[:-len(SEGMENT_SUFFIX)] for name in names
+                  if name.endswith(SEGMENT_SUFFIX) and name[:-len(SEGMENT_SUFFIX)] + INDEX_SUFFIX in names)
+
+def read_session(root_dir, session_id):
+    """Read-only {q_num: (frames, sample_rate)} of a stored session - nothing is evicted or touched"""
+    segment = _Segment.load(os.path.join(root_dir, f"{session_id}{SEGMENT_SUFFIX}"))
+    if segment is None:
+        return {}
+    answers = {}
+    with open(segment.path, "rb") as f:
+        for q_num, (offset, length, sample_rate) in sorted(segment.index.items()):
+            f.seek(offset)
+            answers[q_num] = (f.read(length), sample_rate)
+    return answers
+
+class AudioStore:
+    """Per-session audio segments under a global byte budget with LRU eviction"""
+
+    def __init__(self, root_dir, budget_bytes, sample_rate=16000, max_open_segments=MAX_OPEN_SEGMENTS):
+        self.root_dir = root_dir
+        self.budget_bytes = budget_bytes
+        self.sample_rate = sample_rate
+        self.max_open_segments = max_open_segments
+        # Recently used segments, least recently used first. Only their indexes
+        # are kept; the file is opened per write and mapped only while read.
+        self._sessions = OrderedDict()  # session_id -> _Segment
+        self._loaded = False
+        self._lock = threading.Lock()
+
+    @property
+    def total_bytes(self):
+        with self._lock:
+            self._ensure_loaded()
+            return sum(size for _, size, _ in self._scan())
+
+    def _segment_path(self, session_id):
+        return os.path.join(self.root_dir, f"{session_id}{SEGMENT_SUFFIX}")
+
+    def _scan(self):
+        """(session_id, size, mtime) of every indexed segment on disk, oldest first"""
+        if not os.path.isdir(self.root_dir):
+            return []
+        found = []
+        for name in os.listdir(self.root_dir):
+            if not name.endswith(SEGMENT_SUFFIX):
+                continue
+            session_id = name[:-len(SEGMENT_SUFFIX)]
+            path = os.path.join(self.root_dir, name)
+            if not os.path.exists(os.path.join(self.root_dir, session_id + INDEX_SUFFIX)):
+                continue
+            try:
+                stat = os.stat(path)
+            except FileNotFoundError:
+                continue
+            found.append((session_id, stat.st_size, stat.st_mtime))
+        found.sort(key=lambda item: item[2])
+        return found
+
+    def _ensure_loaded(self):
+        """Clean up after interrupted writes on first use, then evict down to the budget"""
+        if self._loaded:
+            return
+        self._loaded = True
+        if not os.path.isdir(self.root_dir):
+            return
+
+        names = set(os.listdir(self.root_dir))
+        orphan_before = time.time() - ORPHAN_GRACE_SECONDS
+        for name in names:
+            stem, ext = os.path.splitext(name)
+            path = os.path.join(self.root_dir, name)
+            if ext == SEGMENT_SUFFIX and stem + INDEX_SUFFIX not in names:
+                try:
+                    if os.stat(path).st_mtime > orphan_before:
+                        continue  # may be another process's first answer
+                except FileNotFoundError:
+                    continue
+                print(f"🗑️ Removing orphaned audio segment {name}")
+                _remove_files(path)
+            elif ext == INDEX_SUFFIX and stem + SEGMENT_SUFFIX not in names:
+                _remove_files(path)
+
+        # Segments are opened on first use, so a large directory costs no handles
+        self._evict(keep=None)
+
+    def _open(self, session_id):
+        """Load a session another process (or a previous run) stored, or None"""
+        path = self._segment_path(session_id)
+        try:
+            segment = _Segment.load(path)
+        except (OSError, ValueError) as e:
+            print(f"⚠️ Unreadable audio segment {path}: {e}")
+            return None
+        if segment is None or not segment.index:
+            return None
+        self._remember(session_id, segment)
+        return segment
+
+    def _remember(self, session_id, segment):
+        """Mark a segment most recently used and unmap the least recently used ones"""
+        self._sessions[session_id] = segment
+        self._sessions.move_to_end(session_id)
+        while len(self._sessions) > self.max_open_segments:
+            _, oldest = self._sessions.popitem(last=False)
+            oldest.close(remove=False)
+
+    def _lookup(self, session_id):
+        """This process's segment for a session, reconciled with the directory"""
+        segment = self._sessions.get(session_id)
+        if segment is not None and (not segment.on_disk() or segment.is_stale()):
+            # Evicted or appended to by another process sharing the directory
+            self._sessions.pop(session_id)
+            segment.close(remove=False)
+            segment = None
+        if segment is None and os.path.exists(self._segment_path(session_id)):
+            segment = self._open(session_id)
+        return segment
+
+    def put(self, session_id, q_num, audio):
+        """Store an sr.AudioData answer; returns True if it was retained"""
+        frames = audio.get_raw_data(convert_rate=self.sample_rate, convert_width=SAMPLE_WIDTH)
+        return self.put_frames(session_id, q_num, frames, self.sample_rate)
+
+    def put_frames(self, session_id, q_num, frames, sample_rate):
+        """Store raw int16 mono frames; returns True if they were retained"""
+        if not frames:
+            print(f"⚠️ Audio for {session_id} Q{q_num} is empty - not stored")
+            return False
+        if len(frames) > self.budget_bytes:
+            print(f"⚠️ Audio for {session_id} Q{q_num} exceeds the retention budget - not stored")
+            return False
+
+        with self._lock:
+            self._ensure_loaded()
+            segment = self._lookup(session_id)
+            if segment is None:
+                os.makedirs(self.root_dir, exist_ok=True)
+                segment = _Segment(self._segment_path(session_id))
+
+            # A re-recorded answer replaces the index entry; its old bytes stay
+            # in the segment (and in the budget) until the session is evicted
+            offset = segment.append(frames)
+            segment.index[q_num] = (offset, len(frames), sample_rate)
+            segment.save_index()
+            self._remember(session_id, segment)
+
+            self._evict(keep=session_id)
+            return segment.on_disk()
+
+    def _evict(self, keep):
+        """Drop least recently used sessions until the directory is within budget"""
+        on_disk = self._scan()
+        total = sum(size for _, size, _ in on_disk)
+        for session_id, size, _ in on_disk:
+            if total <= self.budget_bytes:
+                return
+            if session_id != keep:
+                self._drop(session_id)
+                total -= size
+
+        # Only the current session is left and it is still over budget
+        if total > self.budget_bytes and keep is not None:
+            print(f"⚠️ Session {keep} audio exceeds the retention budget - evicting it")
+            self._drop(keep)
+
+    def _drop(self, session_id):
+        segment = self._sessions.pop(session_id, None)
+        if segment is not None:
+            segment.close()
+        else:
+            path = self._segment_path(session_id)
+            _remove_files(path, path[:-len(SEGMENT_SUFFIX)] + INDEX_SUFFIX)
+        print(f"🗑️ Evicted stored audio for session {session_id}")
+
+    def has(self, session_id, q_num):
+        with self._lock:
+            self._ensure_loaded()
+            segment = self._lookup(session_id)
+            return segment is not None and q_num in segment.index
+
+    def get(self, session_id, q_num):
+        """Zero-copy (memoryview, sample_rate) for a stored answer, or None"""
+        with self._lock:
+            self._ensure_loaded()
+            segment = self._lookup(session_id)
+            if segment is None or q_num not in segment.index:
+                return None
+            self._remember(session_id, segment)
+            try:
+                os.utime(segment.path)
+            except OSError:
+                pass
+            offset, length, sample_rate = segment.index[q_num]
+            return segment.view(offset, length), sample_rate
+
+    def get_audio_data(self, session_id, q_num):
+        """Stored answer as sr.AudioData for re-recognition, or None"""
+        import speech_recognition as sr
+
+        stored = self.get(session_id, q_num)
+        if stored is None:
+            return None
+        view, sample_rate = stored
+        with view:
+            return sr.AudioData(view.tobytes(), sample_rate, SAMPLE_WIDTH)
+
+    def drop_session(self, session_id):
+        with self._lock:
+            self._ensure_loaded()
+            if self._lookup(session_id) is not None:
+                self._drop(session_id)
+
+    def clear(self):
+        with self._lock:
+            self._ensure_loaded()
+            for session_id, _, _ in self._scan():
+                self._drop(session_id)
@@ -0,0 +1,248 @@
+"""
+Headless batch re-processing of recorded consultations.
+
+Re-runs transcription, analytical insights and the physician dashboard over
+stored consultations so recognizer or prompt changes can be applied to past
+interviews. It reads what the kiosks already keep:
+
+    <audio_dir>/<session_id>.pcm, <session_id>.json   AudioStore segments
+    consultation_archive.jsonl                        archived consultations
+
+Every session with stored audio or an archive record is processed. Answers
+with stored audio are transcribed again; answers without it (e.g. evicted
+from the audio budget) keep their archived text. The archive also supplies
+the recording date. Both are only read - the audio store is not evicted or
+touched, so a batch can run next to live kiosks.
+
+Transcription runs in a process pool, one consultation per task. The LLM
+summary and the dashboard run in the parent, in a thread pool of
+--llm-concurrency, so pool workers never sit on a core waiting for the API.
+
+Results are appended to <output_dir>/results.jsonl as each consultation
+finishes (one dashboard markdown file per consultation alongside it), so an
+interrupted run resumes where it stopped.
+
+Usage:
+    python main.py batch <audio_dir> <output_dir> [--archive PATH] [--workers N] [--llm-concurrency N]
+"""
+import argparse
+import json
+import os
+import time
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, ThreadPoolExecutor, wait
+from datetime import datetime
+
+from audio_store import SAMPLE_WIDTH, list_sessions, read_session
+
+RESULTS_FILE = "results.jsonl"
+ERRORS_FILE = "errors.jsonl"
+DEFAULT_ARCHIVE_PATH = "consultation_archive.jsonl"
+
+def scan_archive(archive_path):
+    """{session_id: byte offset of its latest archive record}, streamed line by line"""
+    offsets = {}
+    if not archive_path or not os.path.exists(archive_path):
+        return offsets
+
+    with open(archive_path, "rb") as f:
+        offset = 0
+        for line in f:
+            if line.endswith(b"\n") and line.strip():
+                try:
+                    offsets[json.loads(line)["session_id"]] = offset
+                except (ValueError, KeyError):
+                    print(f"⚠️ Skipping unreadable archive entry at byte {offset}")
+            offset += len(line)
+    return offsets
+
+def read_archive_record(archive_path, offset):
+    """The archive record at a byte offset from scan_archive()"""
+    with open(archive_path, "rb") as f:
+        f.seek(offset)
+        return json.loads(f.readline())
+
+def find_consultations(audio_dir, archive_path=None):
+    """[(session_id, archive offset or None)] for sessions with stored audio or an archive record"""
+    offsets = scan_archive(archive_path)
+    session_ids = set(list_sessions(audio_dir)) | set(offsets)
+    return [(session_id, offsets.get(session_id)) for session_id in sorted(session_ids)]
+
+def load_completed(output_dir):
+    """Consultation IDs already written to results.jsonl"""
+    completed = set()
+    results_path = os.path.join(output_dir, RESULTS_FILE)
+    if not os.path.exists(results_path):
+        return completed
+
+    with open(results_path, encoding="utf-8") as f:
+        for line in f:
+            try:
+                completed.add(json.loads(line)["consultation_id"])
+            except (ValueError, KeyError):
+                # Partial line from an interrupted write - reprocess it
+                continue
+    return completed
+
+def transcribe_consultation(consultation_id, audio_dir, archive_path, archive_offset):
+    """Re-transcribe one stored consultation (runs in a worker process)"""
+    import speech_recognition as sr
+    import main
+
+    record = read_archive_record(archive_path, archive_offset) if archive_offset is not None else {}
+    archived_answers = {int(q_num): answer for q_num, answer in record.get("answers", {}).items()}
+    stored_audio = read_session(audio_dir, consultation_id)
+
+    recognizer = sr.Recognizer()
+    responses = []
+    for q_num in sorted(set(stored_audio) | set(archived_answers)):
+        if q_num in stored_audio:
+            frames, sample_rate = stored_audio[q_num]
+            try:
+                answer = main.transcribe_audio(sr.AudioData(frames, sample_rate, SAMPLE_WIDTH), recognizer)
+                source = "audio"
+            except Exception as e:
+                print(f"❌ {consultation_id} Q{q_num} audio error: {e}")
+                answer = archived_answers.get(q_num, "Audio system error")
+                source = "archive" if q_num in archived_answers else "audio"
+        else:
+            answer = archived_answers[q_num]
+            source = "archive"
+
+        responses.append({
+            "q_num": q_num,
+            "question": main.QUESTIONS[q_num - 1] if 0 < q_num <= len(main.QUESTIONS) else f"Question {q_num}",
+            "answer": answer,
+            "source": source,
+            "timestamp": ""
+        })
+
+    return {
+        "consultation_id": consultation_id,
+        "recorded_at": record.get("recorded_at"),
+        "responses": responses
+    }
+
+def analyze_consultation(transcribed):
+    """Summary and dashboard for a transcribed consultation (runs in the parent's LLM threads)"""
+    import main
+
+    responses = transcribed["responses"]
+    if not responses:
+        # Nothing to analyze - record it as done so resumes don't retry it
+        print(f"⚠️ {transcribed['consultation_id']} has no recorded responses - skipping analysis")
+        return dict(transcribed,
+                    processed_at=datetime.now().isoformat(timespec="seconds"),
+                    status="no_responses",
+                    summary="No responses were recorded for this consultation.",
+                    dashboard="")
+
+    recorded_at = transcribed["recorded_at"]
+    summary = main.generate_medical_summary(responses)
+    dashboard = main.create_physician_dashboard(
+        responses, summary, datetime.fromisoformat(recorded_at) if recorded_at else None)
+
+    return dict(transcribed,
+                processed_at=datetime.now().isoformat(timespec="seconds"),
+                status="processed",
+                summary=summary,
+                dashboard=dashboard)
+
+def _append_line(path, record):
+    """Append one JSON record and flush it to disk"""
+    with open(path, "a", encoding="utf-8") as f:
+        f.write(json.dumps(record, ensure_ascii=False) + "\n")
+        f.flush()
+        os.fsync(f.fileno())
+
+def run_batch(audio_dir, output_dir, workers=None, llm_concurrency=2, archive_path=DEFAULT_ARCHIVE_PATH):
+    """Process every pending consultation: transcription in a process pool, LLM calls in threads"""
+    workers = workers or os.cpu_count() or 1
+    if workers < 1:
+        raise ValueError(f"workers must be at least 1, got {workers}")
+    if llm_concurrency < 1:
+        raise ValueError(f"llm_concurrency must be at least 1, got {llm_concurrency}")
+    os.makedirs(output_dir, exist_ok=True)
+
+    consultations = find_consultations(audio_dir, archive_path)
+    completed = load_completed(output_dir)
+    pending = [item for item in consultations if item[0] not in completed]
+
+    print(f"📂 Found {len(consultations)} consultations, {len(completed)} already done, {len(pending)} to process")
+    print(f"⚙️ Transcription workers: {workers} | Max in-flight LLM calls: {llm_concurrency}")
+    if not pending:
+        return {"processed": 0, "failed": 0, "elapsed": 0.0, "items_per_sec": 0.0}
+
+    results_path = os.path.join(output_dir, RESULTS_FILE)
+    errors_path = os.path.join(output_dir, ERRORS_FILE)
+
+    processed = 0
+    failed = 0
+    start = time.perf_counter()
+
+    with ProcessPoolExecutor(max_workers=workers) as pool, \
+            ThreadPoolExecutor(max_workers=llm_concurrency) as llm_pool:
+        queue = iter(pending)
+        in_flight = {}  # future -> (consultation id, stage)
+        # Bound the work in both stages so huge archives don't sit in memory
+        window = workers * 2 + llm_concurrency
+
+        def submit_next():
+            item = next(queue, None)
+            if item is not None:
+                consultation_id, archive_offset = item
+                future = pool.submit(transcribe_consultation, consultation_id, audio_dir, archive_path, archive_offset)
+                in_flight[future] = (consultation_id, "transcribe")
+
+        for _ in range(window):
+            submit_next()
+
+        while in_flight:
+            done, _ = wait(in_flight, return_when=FIRST_COMPLETED)
+            for future in done:
+                consultation_id, stage = in_flight.pop(future)
+                try:
+                    result = future.result()
+                except Exception as e:
+                    failed += 1
+                    print(f"❌ {consultation_id} failed: {e}")
+                    _append_line(errors_path, {"consultation_id": consultation_id, "error": str(e)})
+                else:
+                    if stage == "transcribe":
+                        # Hand it to the LLM threads; it keeps its place in the window
+                        in_flight[llm_pool.submit(analyze_consultation, result)] = (consultation_id, "analyze")
+                        continue
+                    processed += 1
+                    if result["dashboard"]:
+                        with open(os.path.join(output_dir, f"{consultation_id}.md"), "w", encoding="utf-8") as f:
+                            f.write(result["dashboard"])
+                    _append_line(results_path, result)
+
+                elapsed = time.perf_counter() - start
+                finished = processed + failed
+                print(f"📊 [{finished}/{len(pending)}] {consultation_id} - {finished / elapsed:.2f} items/sec")
+                submit_next()
+
+    elapsed = time.perf_counter() - start
+    rate = (processed + failed) / elapsed if elapsed > 0 else 0.0
+    print(f"🏁 Batch complete: {processed} processed, {failed} failed in {elapsed:.1f}s ({rate:.2f} items/sec)")
+    return {"processed": processed, "failed": failed, "elapsed": elapsed, "items_per_sec": rate}
+
+def _positive_int(value):
+    number = int(value)
+    if number < 1:
+        raise argparse.ArgumentTypeError(f"must be at least 1, got {number}")
+    return number
+
+def run_batch_cli(argv=None):
+    """Command line entry point for batch re-processing"""
+    parser = argparse.ArgumentParser(prog="main.py batch", description="Re-process recorded consultations")
+    parser.add_argument("audio_dir", help="Audio store directory (AUDIO_STORE_DIR)")
+    parser.add_argument("output_dir", help="Directory for results.jsonl and dashboards")
+    parser.add_argument("--archive", default=DEFAULT_ARCHIVE_PATH,
+                        help=f"Consultation archive (default: {DEFAULT_ARCHIVE_PATH})")
+    parser.add_argument("--workers", type=_positive_int, default=None, help="Transcription processes (default: all cores)")
+    parser.add_argument("--llm-concurrency", type=_positive_int, default=2, help="Maximum in-flight LLM calls")
+    args = parser.parse_args(argv)
+
+    summary = run_batch(args.audio_dir, args.output_dir, args.workers, args.llm_concurrency, args.archive)
+    return 1 if summary["failed"] else 0
@@ -0,0 +1,153 @@
+"""
+Benchmark for the consultation archive search index.
+
+Builds an archive of synthetic consultations (100k by default) shaped like
+the records main.py archives: spoken answers drawn from realistic
+per-question vocabularies and a multi-section analytical insights text of a
+few KB, as the LLM returns it. Measures query latency for term, prefix,
+field-scoped and filter queries, the cost of indexing one more consultation
+incrementally, and - for the file-backed archive - the cold-start time to
+index the whole file from a fresh process.
+
+Usage:
+    python benchmarks/bench_archive.py [--consultations N] [--in-memory]
+"""
+import argparse
+import os
+import random
+import statistics
+import sys
+import tempfile
+import time
+from datetime import date, timedelta
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from consultation_archive import ConsultationArchive
+
+ANSWERS = {
+    1: lambda rng: f"I am {rng.randint(4, 90)} years old",
+    2: lambda rng: rng.choice(["teacher", "software engineer", "farmer", "nurse", "student", "driver",
+                               "retired", "shopkeeper", "accountant", "construction worker"]),
+    3: lambda rng: " and ".join(rng.sample(["fever", "headache", "stomach pain", "cough", "sore throat",
+                                           "vomiting", "diarrhea", "back pain", "dizziness", "fatigue",
+                                           "chest pain", "rash", "body ache", "breathlessness"], rng.randint(1, 3))),
+    4: lambda rng: f"{rng.randint(1, 14)} {rng.choice(['days', 'weeks', 'months'])}",
+    5: lambda rng: f"{rng.randint(1, 10)} out of 10",
+    6: lambda rng: rng.choice(["no", "paracetamol", "ibuprofen", "antacid", "cough syrup", "antibiotics",
+                               "no medications"]),
+    7: lambda rng: rng.choice(["yes", "no", "yes street food", "yes at a restaurant", "no home food only"]),
+    8: lambda rng: rng.choice(["yes", "no", "yes my brother was sick", "yes a colleague had flu", "no"]),
+    9: lambda rng: rng.choice(["no", "diabetes", "hypertension", "asthma", "thyroid", "none"]),
+    10: lambda rng: rng.choice(["no", "I feel weak", "trouble sleeping", "loss of appetite", "nothing else"])
+}
+
+INSIGHT_TERMS = ["gastroenteritis", "dehydration", "viral", "infection", "migraine", "hypertension",
+                 "respiratory", "urgent", "follow-up", "hydration", "allergy", "inflammation"]
+
+# Section headings of generate_analytical_insights() output
+INSIGHT_SECTIONS = ["Pain Profile", "Possible Triggers", "Medication Response", "Chronic Condition Context",
+                    "Risk Assessment", "🔍 What Physician May Probe Further"]
+INSIGHT_SENTENCES = [
+    "The patient reports symptoms consistent with {term}, with onset described over the past several days.",
+    "Reported severity suggests moderate discomfort that is affecting daily activities and sleep.",
+    "Recent dietary history raises the possibility of {term} and should be correlated with examination findings.",
+    "Self-medication has provided partial relief, which may mask the progression of {term}.",
+    "No chronic conditions were reported that would substantially change the differential at this stage.",
+    "Red flags such as a persistent high temperature, chest pain or breathlessness should be ruled out promptly.",
+    "Consider asking about fluid intake, urine output and any recent travel to assess {term}.",
+    "Clarify the exact timing and pattern of symptoms, including any aggravating or relieving factors.",
+    "Contact with unwell family members or colleagues supports a possible {term} etiology.",
+    "A focused examination and basic laboratory tests would help confirm or exclude {term}."
+]
+
+QUERIES = [
+    "fever",
+    "q7:yes q8:yes",
+    "q7:street q8:sick*",
+    "q3:\"stomach pain\" q7:yes",
+    "head*",
+    "dehydration quality:good",
+    "q9:diabetes date:2026-09-01..2026-09-30",
+    "insights:urgent q5:9",
+    "quality:poor fever cough",
+    "breath* q9:asthma"
+]
+
+def synthetic_record(rng, i, start_date):
+    answered = rng.sample(range(1, 11), rng.randint(2, 10))
+    day = start_date + timedelta(days=i * 180 // 100_000)
+    valid_count = len(answered)
+    return {
+        "session_id": f"bench-{i:06d}",
+        "recorded_at": f"{day.isoformat()}T{rng.randint(8, 18):02d}:{rng.randint(0, 59):02d}:00",
+        "quality": "GOOD" if valid_count >= 7 else "FAIR" if valid_count >= 4 else "POOR",
+        "answers": {q: ANSWERS[q](rng) for q in sorted(answered)},
+        "summary": synthetic_insights(rng)
+    }
+
+def synthetic_insights(rng):
+    sections = ["🩺 Analytical Insights from Patient Responses"]
+    for heading in INSIGHT_SECTIONS:
+        sentences = rng.sample(INSIGHT_SENTENCES, rng.randint(3, 5))
+        body = " ".join(sentence.format(term=rng.choice(INSIGHT_TERMS)) for sentence in sentences)
+        sections.append(f"{heading}\n{body}")
+    return "\n\n".join(sections)
+
+def percentile(values, pct):
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(round(pct / 100 * (len(ordered) - 1))))]
+
+def main():
+    parser = argparse.ArgumentParser(description="Consultation archive search benchmark")
+    parser.add_argument("--consultations", type=int, default=100_000)
+    parser.add_argument("--repeats", type=int, default=50)
+    parser.add_argument("--in-memory", action="store_true", help="Keep the archive in memory instead of a JSONL file")
+    parser.add_argument("--seed", type=int, default=11)
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    start_date = date(2026, 5, 1)
+    path = None if args.in_memory else os.path.join(tempfile.mkdtemp(), "archive.jsonl")
+    archive = ConsultationArchive(path)
+
+    print(f"🏥 Indexing {args.consultations} synthetic consultations ({'file-backed' if path else 'in-memory'})...")
+    build_started = time.perf_counter()
+    for i in range(args.consultations):
+        archive.add(synthetic_record(rng, i, start_date))
+    build_seconds = time.perf_counter() - build_started
+    print(f"   Indexed in {build_seconds:.1f}s ({args.consultations / build_seconds:.0f} consultations/sec)")
+
+    add_times = []
+    for i in range(100):
+        record = synthetic_record(rng, args.consultations + i, start_date)
+        t = time.perf_counter()
+        archive.add(record)
+        add_times.append((time.perf_counter() - t) * 1000)
+    print(f"   Incremental add: median {statistics.median(add_times):.3f} ms, p95 {percentile(add_times, 95):.3f} ms")
+
+    if path:
+        size = os.path.getsize(path)
+        print(f"   Archive file: {size / 1e6:.1f} MB ({size / len(archive):.0f} bytes per consultation)")
+        # What a restarted front end or worker pays before its first search
+        cold_started = time.perf_counter()
+        cold_count = len(ConsultationArchive(path))
+        cold_seconds = time.perf_counter() - cold_started
+        print(f"   Cold start: indexed {cold_count} consultations from the file in {cold_seconds:.1f}s")
+
+    print(f"\n   {'query':45} {'matches':>8} {'p50 ms':>8} {'p95 ms':>8}")
+    all_times = []
+    for query in QUERIES:
+        times = []
+        for _ in range(args.repeats):
+            t = time.perf_counter()
+            total, _ = archive.search(query)
+            times.append((time.perf_counter() - t) * 1000)
+        all_times.extend(times)
+        print(f"   {query:45} {total:8d} {statistics.median(times):8.2f} {percentile(times, 95):8.2f}")
+
+    print(f"\n   All queries: p50 {statistics.median(all_times):.2f} ms, p95 {percentile(all_times, 95):.2f} ms, "
+          f"max {max(all_times):.2f} ms")
+
+if __name__ == "__main__":
+    main()
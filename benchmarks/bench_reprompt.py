@@ -0,0 +1,147 @@
+"""
+Valid-answer yield per minute of patient time: single-shot vs re-prompt.
+
+Replays recorded recognition outcomes through the consultation timing model
+and the RepromptPolicy used by main.py, with the questions, prompts and
+timings from interview.py. Each consultation in a replay fixture lists, per
+question, the outcomes of successive attempts at that question:
+
+    {"consultations": [
+        {"id": "c0001", "questions": [
+            [{"answer": "42", "confidence": 0.91, "speech_seconds": 1.8, "correct": true}],
+            [{"answer": "Could not understand", "confidence": null, "speech_seconds": 3.0, "correct": false},
+             {"answer": "teacher", "confidence": 0.84, "speech_seconds": 1.2, "correct": true}],
+            ...
+        ]}
+    ]}
+
+"speech_seconds" is null for a timeout. "correct" marks whether the
+transcript matches what the patient said. Single-shot only ever uses the
+first attempt. Without --fixtures, a synthetic replay set is generated
+(--save-fixtures writes it out for reuse).
+
+Usage:
+    python benchmarks/bench_reprompt.py [--fixtures replay.json] [--consultations N]
+"""
+import argparse
+import json
+import os
+import random
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from interview import (
+    QUESTIONS, REPEAT_PROMPT, NOT_HEARD_PROMPTS, TTS_WORDS_PER_MINUTE, COUNTDOWN_SECONDS,
+    AMBIENT_ADJUST_SECONDS, LISTEN_TIMEOUT_SECONDS, PAUSE_BETWEEN_QUESTIONS_SECONDS,
+    REPROMPT_CONFIDENCE_THRESHOLD, REPROMPT_BUDGET, REPROMPT_LISTEN_SECONDS
+)
+from reprompt import RepromptPolicy, choose_better, is_captured
+
+# Timing model of run_single_question() in main.py, from the same interview settings.
+# Re-prompts play audio pre-rendered at startup (main.prerender_prompts), so
+# they cost their spoken length with no TTS engine start-up.
+SECONDS_PER_WORD = 60 / TTS_WORDS_PER_MINUTE
+RECOGNITION_SECONDS = 1.0
+
+def spoken_seconds(text):
+    return len(text.split()) * SECONDS_PER_WORD
+
+def synthetic_attempt(rng):
+    roll = rng.random()
+    if roll < 0.10:
+        return {"answer": "No response (timeout)", "confidence": None, "speech_seconds": None, "correct": False}
+    if roll < 0.20:
+        return {"answer": "Could not understand", "confidence": None,
+                "speech_seconds": rng.uniform(1.5, 4.0), "correct": False}
+    confidence = rng.uniform(0.3, 0.6) if roll < 0.40 else rng.uniform(0.6, 0.98)
+    return {"answer": "answer", "confidence": round(confidence, 3),
+            "speech_seconds": round(rng.uniform(0.8, 4.0), 2), "correct": rng.random() < confidence}
+
+def generate_fixtures(consultations, seed):
+    rng = random.Random(seed)
+    return {"consultations": [
+        {"id": f"c{i:04d}", "questions": [[synthetic_attempt(rng) for _ in range(3)] for _ in QUESTIONS]}
+        for i in range(consultations)
+    ]}
+
+def listen_seconds(attempt, timeout):
+    speech = attempt["speech_seconds"]
+    return AMBIENT_ADJUST_SECONDS + (timeout if speech is None else min(speech, timeout) + RECOGNITION_SECONDS)
+
+def replay(fixtures, reprompt, threshold=REPROMPT_CONFIDENCE_THRESHOLD, budget=REPROMPT_BUDGET):
+    totals = {"seconds": 0.0, "captured": 0, "correct": 0, "answers": 0, "reprompts": 0}
+
+    for consultation in fixtures["consultations"]:
+        policy = RepromptPolicy(threshold, budget)
+        for q_index, attempts in enumerate(consultation["questions"]):
+            totals["seconds"] += spoken_seconds(QUESTIONS[q_index]) + COUNTDOWN_SECONDS
+            totals["seconds"] += listen_seconds(attempts[0], LISTEN_TIMEOUT_SECONDS)
+            result = attempts[0]
+
+            retries = 0
+            while reprompt and retries + 1 < len(attempts) and policy.should_reprompt(result, retries):
+                policy.record_reprompt()
+                retries += 1
+                retry = attempts[retries]
+                timed_out = result["answer"] == "No response (timeout)"
+                totals["seconds"] += spoken_seconds(NOT_HEARD_PROMPTS[q_index] if timed_out else REPEAT_PROMPT)
+                totals["seconds"] += listen_seconds(retry, REPROMPT_LISTEN_SECONDS)
+                result = choose_better(result, retry)
+
+            totals["reprompts"] += retries
+            totals["answers"] += 1
+            totals["captured"] += is_captured(result)
+            totals["correct"] += bool(result.get("correct"))
+            if q_index < len(consultation["questions"]) - 1:
+                totals["seconds"] += PAUSE_BETWEEN_QUESTIONS_SECONDS
+
+    minutes = totals["seconds"] / 60
+    totals["captured_per_minute"] = totals["captured"] / minutes
+    totals["correct_per_minute"] = totals["correct"] / minutes
+    totals["minutes_per_consultation"] = minutes / len(fixtures["consultations"])
+    return totals
+
+def main():
+    parser = argparse.ArgumentParser(description="Re-prompt policy replay benchmark")
+    parser.add_argument("--fixtures", help="Replay fixture JSON (default: generate a synthetic set)")
+    parser.add_argument("--consultations", type=int, default=2000)
+    parser.add_argument("--seed", type=int, default=5)
+    parser.add_argument("--save-fixtures", help="Write the generated replay set to this path")
+    parser.add_argument("--threshold", type=float, default=REPROMPT_CONFIDENCE_THRESHOLD)
+    parser.add_argument("--budget", type=int, default=REPROMPT_BUDGET)
+    args = parser.parse_args()
+
+    if args.fixtures:
+        with open(args.fixtures, encoding="utf-8") as f:
+            fixtures = json.load(f)
+        source = args.fixtures
+    else:
+        fixtures = generate_fixtures(args.consultations, args.seed)
+        source = f"synthetic, seed {args.seed}"
+        if args.save_fixtures:
+            with open(args.save_fixtures, "w", encoding="utf-8") as f:
+                json.dump(fixtures, f)
+
+    print(f"🏥 Replaying {len(fixtures['consultations'])} consultations ({source})")
+    print(f"   Threshold {args.threshold}, budget {args.budget} re-prompts per consultation\n")
+
+    single = replay(fixtures, reprompt=False)
+    retried = replay(fixtures, reprompt=True, threshold=args.threshold, budget=args.budget)
+
+    print(f"   {'':28} {'single-shot':>12} {'re-prompt':>12} {'change':>8}")
+    rows = [
+        ("Captured answers", "captured", "{:.0f}"),
+        ("Correct answers", "correct", "{:.0f}"),
+        ("Minutes per consultation", "minutes_per_consultation", "{:.2f}"),
+        ("Captured answers / minute", "captured_per_minute", "{:.3f}"),
+        ("Correct answers / minute", "correct_per_minute", "{:.3f}"),
+    ]
+    for label, key, fmt in rows:
+        change = (retried[key] / single[key] - 1) * 100 if single[key] else 0.0
+        print(f"   {label:28} {fmt.format(single[key]):>12} {fmt.format(retried[key]):>12} {change:+7.1f}%")
+    print(f"\n   Re-prompts used: {retried['reprompts']} "
+          f"({retried['reprompts'] / len(fixtures['consultations']):.2f} per consultation)")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,139 @@
+"""
+Multi-process load test for shared session state.
+
+Starts N worker processes that run main.py's worker path: serve_jobs() pulls
+jobs from a Redis-protocol session store and hands them to
+main.handle_worker_job(), which admits the session through the scheduler and
+runs the full consultation loop (questions, re-prompt policy, progress
+events, summary, dashboard, archive). This process acts as the front end: it
+sends each session to its sticky worker with main.dispatch_consultation() and
+waits for every session state to reach "complete".
+
+Only the devices and remote services are stubbed: listen_for_answer() does
+CPU-bound work per answer (standing in for audio handling and response
+processing under the GIL) and returns a confident answer, speak_text() and
+the LLM call return immediately, pauses are skipped and the archive is kept
+in memory.
+
+Reports session throughput for each worker count and the scaling
+efficiency relative to one worker. Needs the app's requirements installed and
+a local server, e.g.:
+
+    redis-server --port 6379 &
+    python benchmarks/bench_scale_out.py --redis-url redis://localhost:6379/15
+"""
+import argparse
+import multiprocessing as mp
+import os
+import sys
+import time
+import types
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from session_store import RedisSessionStore, serve_jobs
+
+FINISHED_STATUSES = ("complete", "stopped", "error", "rejected")
+
+def busy_work(iterations):
+    total = 0
+    for i in range(iterations):
+        total += i * i % 7
+    return total
+
+def worker_process(url, prefix, worker_index, work_per_question, sessions, stop_event):
+    sys.stdout = open(os.devnull, "w")
+    import main
+    from consultation_archive import ConsultationArchive
+    from scheduler import ConsultationScheduler
+
+    def simulated_answer(timeout=10, on_audio=None, session_id=None, device_index=None):
+        busy_work(work_per_question)
+        return {"answer": "7", "confidence": 0.9, "alternatives": []}
+
+    main.listen_for_answer = simulated_answer
+    main.speak_text = lambda text: True
+    main.generate_analytical_insights = lambda valid_responses: "Simulated insights"
+    main.time = types.SimpleNamespace(time=time.time, sleep=lambda seconds: None)
+    main.consultation_archive = ConsultationArchive()
+    main.session_store = RedisSessionStore(url, prefix=prefix)
+    # The whole load is dispatched at once, so let every session wait its turn
+    main.scheduler = ConsultationScheduler(
+        max_active=main.MAX_ACTIVE_CONSULTATIONS,
+        max_waiting=sessions,
+        stt_slots=main.STT_CONCURRENCY,
+        llm_slots=main.LLM_CONCURRENCY,
+        questions_per_session=len(main.QUESTIONS)
+    )
+    main.CONSULTATION_WORKERS = 0
+    serve_jobs(main.session_store, worker_index, main.handle_worker_job, should_stop=stop_event.is_set)
+
+def run_load(app, url, worker_count, sessions, work_per_question):
+    prefix = f"bench-{os.getpid()}-{worker_count}-{time.time_ns()}"
+    app.session_store = RedisSessionStore(url, prefix=prefix)
+    app.CONSULTATION_WORKERS = worker_count
+    stop_event = mp.Event()
+
+    workers = [
+        mp.Process(target=worker_process,
+                   args=(url, prefix, i, work_per_question, sessions, stop_event), daemon=True)
+        for i in range(worker_count)
+    ]
+    for process in workers:
+        process.start()
+    # The front end only dispatches to workers that have sent a heartbeat
+    while not all(app.session_store.worker_alive(i) for i in range(worker_count)):
+        time.sleep(0.05)
+
+    start = time.perf_counter()
+    session_ids = [f"s{i:05d}" for i in range(sessions)]
+    for session_id in session_ids:
+        app.dispatch_consultation(session_id)
+
+    pending = set(session_ids)
+    statuses = {}
+    while pending:
+        for session_id in list(pending):
+            state = app.session_store.load_state(session_id) or {}
+            if state.get("status") in FINISHED_STATUSES and not state.get("is_running"):
+                statuses[session_id] = state["status"]
+                pending.discard(session_id)
+        if pending:
+            time.sleep(0.02)
+    elapsed = time.perf_counter() - start
+
+    stop_event.set()
+    for process in workers:
+        process.join(timeout=5)
+
+    failed = sum(1 for status in statuses.values() if status != "complete")
+    return sessions / elapsed, failed
+
+def main():
+    parser = argparse.ArgumentParser(description="Shared session state scale-out load test")
+    parser.add_argument("--redis-url", default="redis://localhost:6379/15")
+    parser.add_argument("--workers", default="1,2,4", help="Comma-separated worker counts")
+    parser.add_argument("--sessions", type=int, default=64)
+    parser.add_argument("--work", type=int, default=300_000, help="CPU iterations per answer")
+    args = parser.parse_args()
+
+    try:
+        RedisSessionStore(args.redis_url).ping()
+    except OSError as e:
+        print(f"❌ Could not reach a Redis server at {args.redis_url}: {e}")
+        return 1
+
+    import main as app
+
+    print(f"🏥 {args.sessions} sessions per run, {os.cpu_count()} CPU cores, store {args.redis_url}")
+    baseline = None
+    for worker_count in [int(n) for n in args.workers.split(",")]:
+        rate, failed = run_load(app, args.redis_url, worker_count, args.sessions, args.work)
+        baseline = baseline or rate / worker_count
+        efficiency = rate / (baseline * worker_count) * 100
+        failures = f", {failed} not completed" if failed else ""
+        print(f"   {worker_count} worker(s): {rate:7.2f} sessions/sec ({efficiency:.0f}% of linear){failures}")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
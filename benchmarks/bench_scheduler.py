@@ -0,0 +1,152 @@
+"""
+Simulation benchmark for the consultation admission scheduler.
+
+Drives the real ConsultationScheduler with bursty patient arrivals. Each
+simulated consultation answers 10 questions (listening time plus a shared
+STT call) and then generates its summary through the shared LLM slots.
+Patients reporting severe pain at question 5 are boosted.
+
+Time is scaled: one simulated second runs in TIME_SCALE real seconds.
+
+Usage:
+    python benchmarks/bench_scheduler.py [--patients N] [--kiosks N] [--seed N]
+"""
+import argparse
+import os
+import random
+import statistics
+import sys
+import threading
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from scheduler import ConsultationScheduler
+
+TIME_SCALE = 0.002  # real seconds per simulated second
+QUESTIONS = 10
+PAIN_QUESTION_NUM = 5
+
+def sim_sleep(seconds):
+    time.sleep(seconds * TIME_SCALE)
+
+def percentile(values, pct):
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(round(pct / 100 * (len(ordered) - 1))))]
+
+def run_simulation(patients, kiosks, max_waiting, stt_slots, llm_slots, burst_size, burst_gap, red_flag_rate, seed):
+    rng = random.Random(seed)
+    scheduler = ConsultationScheduler(
+        max_active=kiosks, max_waiting=max_waiting, stt_slots=stt_slots, llm_slots=llm_slots,
+        questions_per_session=QUESTIONS
+    )
+
+    results = {}
+    results_lock = threading.Lock()
+    threads = []
+
+    def consultation(session_id, red_flag):
+        started = time.monotonic()
+        for q_num in range(1, QUESTIONS + 1):
+            question_started = time.monotonic()
+            sim_sleep(rng.uniform(6, 10))  # speaking the question + listening
+            with scheduler.stt.slot(session_id):
+                sim_sleep(rng.uniform(0.8, 1.5))
+            if q_num == PAIN_QUESTION_NUM and red_flag:
+                scheduler.boost(session_id, reason="simulated severe pain")
+            scheduler.record_question(session_id, (time.monotonic() - question_started) / TIME_SCALE)
+
+        summary_requested = time.monotonic()
+        with scheduler.llm.slot(session_id):
+            summary_started = time.monotonic()
+            sim_sleep(rng.uniform(4, 8))
+        scheduler.record_summary((time.monotonic() - summary_started) / TIME_SCALE)
+
+        with results_lock:
+            results[session_id].update({
+                "started": started,
+                "finished": time.monotonic(),
+                "llm_wait": (summary_started - summary_requested) / TIME_SCALE
+            })
+        scheduler.finish(session_id)
+
+    def launch(session_id, red_flag):
+        thread = threading.Thread(target=consultation, args=(session_id, red_flag), daemon=True)
+        threads.append(thread)
+        thread.start()
+
+    begin = time.monotonic()
+    arrived = 0
+    while arrived < patients:
+        burst = min(patients - arrived, rng.randint(1, burst_size))
+        for _ in range(burst):
+            session_id = f"p{arrived:04d}"
+            red_flag = rng.random() < red_flag_rate
+            with results_lock:
+                results[session_id] = {"arrived": time.monotonic(), "red_flag": red_flag}
+            ticket = scheduler.submit(session_id, lambda s=session_id, r=red_flag: launch(s, r))
+            with results_lock:
+                results[session_id]["ticket"] = ticket
+            arrived += 1
+        sim_sleep(rng.expovariate(1 / burst_gap))
+
+    while True:
+        with results_lock:
+            pending = [
+                r for r in results.values()
+                if r["ticket"]["status"] != "rejected" and "finished" not in r
+            ]
+        if not pending:
+            break
+        time.sleep(0.01)
+    elapsed = (time.monotonic() - begin) / TIME_SCALE
+
+    served = [r for r in results.values() if "finished" in r]
+    queue_waits = [(r["started"] - r["arrived"]) / TIME_SCALE for r in served]
+    eta_errors = [
+        abs((r["started"] - r["arrived"]) / TIME_SCALE - r["ticket"]["eta_seconds"])
+        for r in served if r["ticket"]["status"] == "queued"
+    ]
+    urgent_llm = [r["llm_wait"] for r in served if r["red_flag"]]
+    routine_llm = [r["llm_wait"] for r in served if not r["red_flag"]]
+
+    return {
+        "served": len(served),
+        "rejected": scheduler.stats["rejected"],
+        "elapsed": elapsed,
+        "throughput_per_hour": len(served) / elapsed * 3600 if elapsed else 0.0,
+        "queue_wait_mean": statistics.mean(queue_waits) if queue_waits else 0.0,
+        "queue_wait_p95": percentile(queue_waits, 95),
+        "eta_error_mean": statistics.mean(eta_errors) if eta_errors else 0.0,
+        "urgent_llm_wait_mean": statistics.mean(urgent_llm) if urgent_llm else 0.0,
+        "routine_llm_wait_mean": statistics.mean(routine_llm) if routine_llm else 0.0
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description="Consultation scheduler simulation benchmark")
+    parser.add_argument("--patients", type=int, default=200)
+    parser.add_argument("--kiosks", type=int, default=4)
+    parser.add_argument("--max-waiting", type=int, default=20)
+    parser.add_argument("--stt-slots", type=int, default=2)
+    parser.add_argument("--llm-slots", type=int, default=1)
+    parser.add_argument("--burst-size", type=int, default=6, help="Maximum patients arriving together")
+    parser.add_argument("--burst-gap", type=float, default=120.0, help="Mean simulated seconds between bursts")
+    parser.add_argument("--red-flag-rate", type=float, default=0.2)
+    parser.add_argument("--seed", type=int, default=7)
+    args = parser.parse_args()
+
+    print(f"🏥 Simulating {args.patients} patients, {args.kiosks} kiosks, "
+          f"{args.stt_slots} STT / {args.llm_slots} LLM slots, bursts of up to {args.burst_size}")
+    r = run_simulation(args.patients, args.kiosks, args.max_waiting, args.stt_slots, args.llm_slots,
+                       args.burst_size, args.burst_gap, args.red_flag_rate, args.seed)
+
+    print(f"   Served:            {r['served']} ({r['rejected']} rejected - queue full)")
+    print(f"   Throughput:        {r['throughput_per_hour']:.1f} consultations/hour (simulated)")
+    print(f"   Queue wait:        mean {r['queue_wait_mean']:.1f}s, p95 {r['queue_wait_p95']:.1f}s")
+    print(f"   Wait ETA error:    mean {r['eta_error_mean']:.1f}s")
+    print(f"   LLM slot wait:     red-flag {r['urgent_llm_wait_mean']:.1f}s, routine {r['routine_llm_wait_mean']:.1f}s")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,204 @@
+"""
+Searchable archive of completed consultations.
+
+Each completed consultation is appended to a JSONL file and indexed in
+memory with an inverted index over its answers (one field per question,
+"q1".."q10") and its analytical insights ("insights"). Date and data-quality
+tier are indexed as filters.
+
+Query syntax - whitespace separated clauses, all of which must match:
+
+    fever                 term in any answer or the insights
+    feve*                 prefix in any answer or the insights
+    q7:yes                term in the answer to question 7
+    q8:sick*              prefix in the answer to question 8
+    q3:"sore throat"      all of these terms in the answer to question 3
+    insights:dehydration  term in the analytical insights
+    date:2026-10-19       consultations on that day
+    date:2026-10-01..2026-10-19
+    quality:poor          data-quality tier (good, fair, poor)
+
+The index follows the file incrementally: refresh() picks up consultations
+appended by other processes (e.g. consultation workers) since the last read.
+"""
+import bisect
+import heapq
+import json
+import os
+import re
+import shlex
+import threading
+from collections import defaultdict
+
+ANY_FIELD = "*"
+TOKEN_PATTERN = re.compile(r"[a-z0-9]+")
+
+def tokenize(text):
+    return TOKEN_PATTERN.findall(text.lower())
+
+class ConsultationArchive:
+    """Append-only consultation archive with an in-memory inverted index"""
+
+    def __init__(self, path=None):
+        self.path = path
+        self._lock = threading.RLock()
+        self._docs = []  # doc_id -> summary fields and record location
+        self._records = []  # full records, only when there is no backing file
+        self._postings = defaultdict(set)  # (field, term) -> doc ids
+        self._terms = defaultdict(list)  # field -> sorted terms, for prefix queries
+        self._by_date = defaultdict(set)
+        self._by_quality = defaultdict(set)
+        self._dates = []  # sorted distinct dates, for ranges
+        self._offset = 0  # bytes of the archive file already indexed
+
+    def __len__(self):
+        with self._lock:
+            self.refresh()
+            return len(self._docs)
+
+    def add(self, record):
+        """Archive a completed consultation and index it
+
+        record: {"session_id", "recorded_at" (ISO), "quality" (GOOD/FAIR/POOR),
+                 "answers" {q_num: answer}, "summary"}
+        """
+        with self._lock:
+            if self.path is None:
+                self._records.append(record)
+                self._index(record, location=len(self._records) - 1)
+                return
+
+            line = (json.dumps(record, ensure_ascii=False) + "\n").encode("utf-8")
+            # One O_APPEND write per record, so concurrent writers don't interleave
+            fd = os.open(self.path, os.O_WRONLY | os.O_APPEND | os.O_CREAT, 0o644)
+            try:
+                os.write(fd, line)
+            finally:
+                os.close(fd)
+            self.refresh()
+
+    def refresh(self):
+        """Index consultations appended to the archive file since the last read"""
+        if self.path is None or not os.path.exists(self.path):
+            return
+        with self._lock:
+            # One record at a time, so a cold start never holds the whole file
+            with open(self.path, "rb") as f:
+                f.seek(self._offset)
+                for line in f:
+                    if not line.endswith(b"\n"):
+                        # Partially written last line - picked up by the next refresh
+                        break
+                    if line.strip():
+                        try:
+                            self._index(json.loads(line), location=self._offset)
+                        except ValueError:
+                            print(f"⚠️ Skipping unreadable archive entry at byte {self._offset}")
+                    self._offset += len(line)
+
+    def _index(self, record, location):
+        doc_id = len(self._docs)
+        date = record.get("recorded_at", "")[:10]
+        quality = record.get("quality", "").upper()
+        answers = record.get("answers", {})
+
+        self._docs.append({
+            "session_id": record.get("session_id", ""),
+            "date": date,
+            "quality": quality,
+            "answered": len(answers),
+            "location": location
+        })
+
+        fields = [(f"q{q_num}", text) for q_num, text in answers.items()]
+        fields.append(("insights", record.get("summary", "")))
+        for field, text in fields:
+            for term in set(tokenize(text)):
+                for key_field in (field, ANY_FIELD):
+                    postings = self._postings[(key_field, term)]
+                    if not postings:
+                        bisect.insort(self._terms[key_field], term)
+                    postings.add(doc_id)
+
+        if date not in self._by_date:
+            bisect.insort(self._dates, date)
+        self._by_date[date].add(doc_id)
+        self._by_quality[quality].add(doc_id)
+
+    def _term_docs(self, field, term):
+        if term.endswith("*"):
+            prefix = term[:-1]
+            terms = self._terms.get(field, [])
+            matched = set()
+            for i in range(bisect.bisect_left(terms, prefix), len(terms)):
+                if not terms[i].startswith(prefix):
+                    break
+                matched |= self._postings[(field, terms[i])]
+            return matched
+        return self._postings.get((field, term), set())
+
+    def _date_docs(self, value):
+        start, _, end = value.partition("..")
+        end = end or start
+        matched = set()
+        for i in range(bisect.bisect_left(self._dates, start), len(self._dates)):
+            if self._dates[i] > end:
+                break
+            matched |= self._by_date[self._dates[i]]
+        return matched
+
+    def _clause_docs(self, clause):
+        """Doc id sets that must all match for one query clause"""
+        field, sep, value = clause.partition(":")
+        if not sep:
+            field, value = ANY_FIELD, clause
+        field = field.lower()
+
+        if field == "date":
+            return [self._date_docs(value)]
+        if field == "quality":
+            return [self._by_quality.get(value.upper(), set())]
+        if field != ANY_FIELD and field != "insights" and not re.fullmatch(r"q\d+", field):
+            raise ValueError(f"Unknown search field: {field}")
+
+        sets = []
+        for word in value.lower().split():
+            prefix = word.endswith("*")
+            for term in tokenize(word):
+                sets.append(self._term_docs(field, term + ("*" if prefix else "")))
+        return sets
+
+    def search(self, query, limit=20):
+        """Most recent consultations matching every clause of the query
+
+        Returns (total_matches, [doc summaries, newest first]).
+        """
+        with self._lock:
+            self.refresh()
+            sets = []
+            for clause in shlex.split(query):
+                sets.extend(self._clause_docs(clause))
+
+            if not sets:
+                return 0, []
+
+            # Intersect smallest first; stop as soon as nothing is left
+            sets.sort(key=len)
+            matched = set(sets[0])
+            for docs in sets[1:]:
+                if not matched:
+                    break
+                matched &= docs
+
+            newest = heapq.nlargest(limit, matched)
+            return len(matched), [dict(self._docs[doc_id], doc_id=doc_id) for doc_id in newest]
+
+    def get(self, doc_id):
+        """Full archived record for a search result"""
+        with self._lock:
+            location = self._docs[doc_id]["location"]
+            if self.path is None:
+                return self._records[location]
+        with open(self.path, "rb") as f:
+            f.seek(location)
+            return json.loads(f.readline())
@@ -0,0 +1,51 @@
+"""
+The spoken interview: questions, re-prompts and timing.
+
+Shared by main.py, which runs the interview, and the benchmarks that model
+its patient time, so both always use the same script and timings.
+"""
+
+# =============================================================================
+# MEDICAL QUESTIONS
+# =============================================================================
+QUESTIONS = [
+    "What is your age?",
+    "What is your profession?",
+    "What health issues are you currently facing?",
+    "How long have you been facing this problem?",
+    "On a scale of 1 to 10, how severe is your pain?",
+    "Have you taken any medications for this problem?",
+    "Have you eaten outside food in the last few days?",
+    "Have you been in contact with any sick person recently?",
+    "Do you have any chronic health conditions?",
+    "Is there anything else about your health?"
+]
+
+# Short re-prompts, built once and spoken right away when an answer is missed
+SHORT_QUESTIONS = [
+    "Your age?",
+    "Your profession?",
+    "Your current health issues?",
+    "For how long?",
+    "Your pain, from 1 to 10?",
+    "Any medications?",
+    "Any outside food recently?",
+    "Any contact with sick people?",
+    "Any chronic conditions?",
+    "Anything else?"
+]
+REPEAT_PROMPT = "Sorry, please repeat that."
+NOT_HEARD_PROMPTS = [f"Sorry, I didn't hear you. {q}" for q in SHORT_QUESTIONS]
+
+# Timing of each question
+TTS_WORDS_PER_MINUTE = 140
+COUNTDOWN_SECONDS = 1
+AMBIENT_ADJUST_SECONDS = 0.5
+LISTEN_TIMEOUT_SECONDS = 8
+PAUSE_BETWEEN_QUESTIONS_SECONDS = 2
+
+# Re-prompt when an answer is missed or recognized below this confidence,
+# at most REPROMPT_BUDGET times per consultation
+REPROMPT_CONFIDENCE_THRESHOLD = 0.4
+REPROMPT_BUDGET = 3
+REPROMPT_LISTEN_SECONDS = 6
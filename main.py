@@ -6,9 +6,27 @@ from groq import Groq
 import json
 from datetime import datetime
 import requests
+from dotenv import load_dotenv
 import threading
 from queue import Queue, Empty
 import asyncio
+import os
+import sys
+
+from audio_store import AudioStore
+from consultation_archive import ConsultationArchive
+from interview import (
+    QUESTIONS, REPEAT_PROMPT, NOT_HEARD_PROMPTS, TTS_WORDS_PER_MINUTE, COUNTDOWN_SECONDS,
+    AMBIENT_ADJUST_SECONDS, LISTEN_TIMEOUT_SECONDS, PAUSE_BETWEEN_QUESTIONS_SECONDS,
+    REPROMPT_CONFIDENCE_THRESHOLD, REPROMPT_BUDGET, REPROMPT_LISTEN_SECONDS
+)
+from reprompt import RepromptPolicy, choose_better
+from scheduler import ConsultationScheduler
+from session_store import create_session_store, serve_jobs
+from triage import parse_pain_severity
+
+# Deployment settings read below (SESSION_STORE_URL, KIOSK_DEVICES, ...) may come from .env
+load_dotenv()
 
 # =============================================================================
 # API KEYS - 
@@ -21,34 +39,132 @@ ELEVENLAB_API_KEY ="" # This is the placeholder a ELEVENLAB key
 VOICE_ID = "h061KGyOtpLYDxcoi8E3"
 MODEL_ID = "eleven_multilingual_v2"
 
-# =============================================================================
-# MEDICAL QUESTIONS
-# =============================================================================
-QUESTIONS = [
-    "What is your age?",
-    "What is your profession?", 
-    "What health issues are you currently facing?",
-    "How long have you been facing this problem?",
-    "On a scale of 1 to 10, how severe is your pain?",
-    "Have you taken any medications for this problem?",
-    "Have you eaten outside food in the last few days?",
-    "Have you been in contact with any sick person recently?",
-    "Do you have any chronic health conditions?",
-    "Is there anything else about your health?"
+# Captured answer audio retention
+AUDIO_STORE_DIR = "audio_segments"
+AUDIO_STORE_BUDGET_BYTES = 256 * 1024 * 1024
+
+# Re-prompts are rendered to WAV once at startup and replayed from memory
+TTS_CACHE_DIR = "tts_cache"
+PRERENDER_TIMEOUT_SECONDS = 30
+SPEECH_RENDER_TIMEOUT_SECONDS = 10
+
+def parse_kiosk_devices(spec):
+    """[(input_device, output_device), ...] from "in:out,in:out" audio device indexes"""
+    kiosks = []
+    for item in spec.split(","):
+        if not item.strip():
+            continue
+        try:
+            input_device, output_device = (int(part) for part in item.split(":"))
+        except ValueError:
+            raise ValueError(f"Invalid kiosk devices {item!r} - expected <microphone index>:<speaker index>")
+        kiosks.append((input_device, output_device))
+    return kiosks
+
+# Consultation admission: one active session per kiosk. A kiosk is a
+# microphone and a speaker, listed as "input:output" device indexes in
+# KIOSK_DEVICES (e.g. "1:4,3:5"). Several kiosks run consultations at once,
+# each heard only on its own speaker, and share the STT and LLM slots below,
+# which go to red-flag sessions first. Unset means one kiosk on the default
+# devices: sessions run one at a time and only the waiting queue applies.
+KIOSK_DEVICES = parse_kiosk_devices(os.environ.get("KIOSK_DEVICES", ""))
+MAX_ACTIVE_CONSULTATIONS = max(1, len(KIOSK_DEVICES))
+MAX_WAITING_PATIENTS = 5
+STT_CONCURRENCY = 1
+LLM_CONCURRENCY = 1
+
+# Red-flag answers that move a session to the front for summary generation
+PAIN_QUESTION_NUM = 5
+RED_FLAG_PAIN_SEVERITY = 8
+
+# Searchable archive of completed consultations
+CONSULTATION_ARCHIVE_PATH = "consultation_archive.jsonl"
+
+# Shared session state: "memory://" (single process) or "redis://host:port/db".
+# With CONSULTATION_WORKERS > 0 this process is a front end that routes each
+# consultation to a worker started with "python main.py worker <index> [devices]"
+# (needs a redis:// store). Each worker uses only its own kiosks: the devices
+# argument, else KIOSK_DEVICES_<index>, else the default microphone and speaker.
+SESSION_STORE_URL = os.environ.get("SESSION_STORE_URL", "memory://")
+CONSULTATION_WORKERS = int(os.environ.get("CONSULTATION_WORKERS", "0"))
+
+# Answers recorded when speech was not captured
+FAILED_ANSWERS = [
+    "No response (timeout)", "Could not understand", "Audio system error", 
+    "Speech recognition error", "Audio error"
 ]
 
+QUALITY_BADGES = {"GOOD": "🟢 GOOD", "FAIR": "🟡 FAIR", "POOR": "🔴 POOR"}
+
 # Global variables
-consultation_state = {
-    "responses": [],
-    "current_question": 0,
-    "status": "ready",
-    "summary": "",
-    "dashboard": "",
-    "is_running": False,
-    "progress_text": "Ready to start consultation",
-    "last_question": "",
-    "last_answer": ""
-}
+prompt_audio = {}  # prompt text -> (sample_width, channels, frame_rate, frames)
+active_sessions = {}  # session_id -> state of a consultation running in this process
+
+# Kiosks not in use as (input_device, output_device); (None, None) = system defaults
+free_kiosks = Queue()
+
+# pyttsx3 returns one shared engine per driver, so kiosks take turns rendering speech
+tts_lock = threading.Lock()
+
+audio_store = AudioStore(AUDIO_STORE_DIR, AUDIO_STORE_BUDGET_BYTES)
+
+def configure_kiosks(kiosks):
+    """Use these (input_device, output_device) kiosks, one active consultation each"""
+    global KIOSK_DEVICES, MAX_ACTIVE_CONSULTATIONS
+    KIOSK_DEVICES = list(kiosks)
+    MAX_ACTIVE_CONSULTATIONS = max(1, len(KIOSK_DEVICES))
+    while not free_kiosks.empty():
+        free_kiosks.get_nowait()
+    for kiosk in KIOSK_DEVICES or [(None, None)]:
+        free_kiosks.put(kiosk)
+    scheduler.max_active = MAX_ACTIVE_CONSULTATIONS
+
+scheduler = ConsultationScheduler(
+    max_active=MAX_ACTIVE_CONSULTATIONS,
+    max_waiting=MAX_WAITING_PATIENTS,
+    stt_slots=STT_CONCURRENCY,
+    llm_slots=LLM_CONCURRENCY,
+    questions_per_session=len(QUESTIONS)
+)
+
+configure_kiosks(KIOSK_DEVICES)
+
+session_store = create_session_store(SESSION_STORE_URL)
+
+consultation_archive = ConsultationArchive(CONSULTATION_ARCHIVE_PATH)
+
+def new_consultation_state(session_id):
+    """Fresh state for a consultation about to start"""
+    return {
+        "session_id": session_id,
+        "responses": [],
+        "current_question": 0,
+        "status": "starting",
+        "summary": "",
+        "dashboard": "",
+        "is_running": True,
+        "microphone": None,
+        "speaker": None,
+        "progress_text": "Starting consultation...",
+        "last_question": "",
+        "last_answer": ""
+    }
+
+def publish_state(state):
+    """Share a consultation's state with the UI and other processes"""
+    try:
+        session_store.save_state(state["session_id"], {**state, "queue": scheduler.snapshot()})
+    except Exception as e:
+        print(f"⚠️ Could not publish session state: {e}")
+
+def set_progress(state, text):
+    """Update progress text and publish it as a progress event"""
+    state["progress_text"] = text
+    try:
+        session_store.publish_event(state["session_id"], text)
+    except Exception as e:
+        print(f"⚠️ Could not publish progress event: {e}")
+    publish_state(state)
 
 def speak_text(text):
     """Text-to-speech with timeout and multiple fallback methods"""
@@ -66,7 +182,7 @@ def speak_text(text):
             nonlocal success
             try:
                 engine = pyttsx3.init()
-                engine.setProperty('rate', 140)
+                engine.setProperty('rate', TTS_WORDS_PER_MINUTE)
                 engine.setProperty('volume', 1.0)
                 engine.say(text)
                 engine.runAndWait()
@@ -142,8 +258,192 @@ def speak_text(text):
     
     return success
 
-def listen_for_speech(timeout=10):
-    """Listen for speech input with better error handling and shorter timeout"""
+def read_wav(path):
+    """(sample_width, channels, frame_rate, frames) of a non-empty WAV file, or None"""
+    import wave
+    
+    try:
+        with wave.open(path, "rb") as wav:
+            frames = wav.readframes(wav.getnframes())
+            if frames:
+                return (wav.getsampwidth(), wav.getnchannels(), wav.getframerate(), frames)
+    except (OSError, EOFError, wave.Error):
+        pass
+    return None
+
+def render_wavs(paths, timeout):
+    """Render {text: wav_path} with the local TTS engine
+
+    Each text is written to a temporary file and renamed into place only once
+    it reads back as a valid WAV, so a render that fails or times out never
+    leaves a truncated file at wav_path.
+    """
+    tmp_paths = {text: f"{path[:-4]}.{os.getpid()}.tmp.wav" for text, path in paths.items()}
+    
+    def render_worker():
+        try:
+            engine = pyttsx3.init()
+            engine.setProperty('rate', TTS_WORDS_PER_MINUTE)
+            for text, tmp_path in tmp_paths.items():
+                engine.save_to_file(text, tmp_path)
+            engine.runAndWait()
+            engine.stop()
+        except Exception as e:
+            print(f"❌ Could not render speech: {e}")
+    
+    render_thread = threading.Thread(target=render_worker, daemon=True)
+    render_thread.start()
+    render_thread.join(timeout=timeout)
+    if render_thread.is_alive():
+        print(f"⏰ Speech rendering timed out after {timeout} seconds")
+    
+    for text, tmp_path in tmp_paths.items():
+        try:
+            if read_wav(tmp_path) is not None:
+                os.replace(tmp_path, paths[text])
+            elif os.path.exists(tmp_path):
+                os.remove(tmp_path)
+        except OSError as e:
+            print(f"⚠️ Could not keep rendered speech {tmp_path}: {e}")
+
+def prerender_prompts():
+    """Render the re-prompts to WAV files once and keep their audio in memory"""
+    import hashlib
+    
+    prompts = [REPEAT_PROMPT] + NOT_HEARD_PROMPTS
+    paths = {
+        text: os.path.join(TTS_CACHE_DIR, hashlib.sha1(f"{TTS_WORDS_PER_MINUTE}:{text}".encode()).hexdigest() + ".wav")
+        for text in prompts
+    }
+    
+    missing = {}
+    for text, path in paths.items():
+        cached = read_wav(path)
+        if cached is not None:
+            prompt_audio[text] = cached
+            continue
+        if os.path.exists(path):
+            # Left unreadable by an earlier failed render - render it again
+            os.remove(path)
+        missing[text] = path
+    
+    if missing:
+        os.makedirs(TTS_CACHE_DIR, exist_ok=True)
+        render_wavs(missing, PRERENDER_TIMEOUT_SECONDS)
+        for text, path in missing.items():
+            # Not rendered, or not a WAV on this platform - speak_text() is used instead
+            cached = read_wav(path)
+            if cached is not None:
+                prompt_audio[text] = cached
+    
+    print(f"   {'✅' if len(prompt_audio) == len(prompts) else '⚪'} Re-prompt audio: {len(prompt_audio)}/{len(prompts)} pre-rendered")
+    return len(prompt_audio)
+
+def play_audio(sample_width, channels, frame_rate, frames, output_device=None):
+    """Play raw PCM frames on an output device (None = system default)"""
+    import pyaudio
+    
+    player = pyaudio.PyAudio()
+    try:
+        stream = player.open(format=player.get_format_from_width(sample_width),
+                             channels=channels, rate=frame_rate, output=True,
+                             output_device_index=output_device)
+        try:
+            stream.write(frames)
+        finally:
+            stream.stop_stream()
+            stream.close()
+    finally:
+        player.terminate()
+
+def speak_prompt(text):
+    """Speak a re-prompt from its pre-rendered audio, falling back to live TTS"""
+    cached = prompt_audio.get(text)
+    if cached is not None:
+        print(f"🗣️ Speaking (pre-rendered): {text}")
+        try:
+            play_audio(*cached)
+            return True
+        except Exception as e:
+            print(f"❌ Pre-rendered prompt playback failed: {e}")
+    return speak_text(text)
+
+def render_speech(text):
+    """Render text to PCM with the local TTS engine, or None"""
+    import tempfile
+    import uuid
+    
+    path = os.path.join(tempfile.gettempdir(), f"speech-{uuid.uuid4().hex}.wav")
+    with tts_lock:
+        render_wavs({text: path}, SPEECH_RENDER_TIMEOUT_SECONDS)
+    audio = read_wav(path)
+    if os.path.exists(path):
+        os.remove(path)
+    return audio
+
+def speak_on_kiosk(text, output_device):
+    """Speak on one kiosk's speaker - safe while other kiosks are speaking"""
+    print(f"🗣️ Speaking on output device {output_device}: {text}")
+    audio = prompt_audio.get(text) or render_speech(text)
+    if audio is not None:
+        try:
+            play_audio(*audio, output_device=output_device)
+            return True
+        except Exception as e:
+            print(f"❌ Kiosk playback failed: {e}")
+    # No fallback to the system voice - it would play on every kiosk's default speaker
+    return False
+
+def speak_to_patient(state, text):
+    """Speak on the consultation's kiosk speaker, or the default output for a single kiosk"""
+    if state["speaker"] is None:
+        return speak_prompt(text)
+    return speak_on_kiosk(text, state["speaker"])
+
+def recognize_answer(audio, recognizer=None, session_id=None):
+    """Recognize captured audio, returning the best transcript with its confidence and alternatives"""
+    if recognizer is None:
+        recognizer = sr.Recognizer()
+    
+    try:
+        if session_id:
+            # Share the limited STT concurrency fairly across active sessions
+            with scheduler.stt.slot(session_id):
+                response = recognizer.recognize_google(audio, language="en-US", show_all=True)
+        else:
+            response = recognizer.recognize_google(audio, language="en-US", show_all=True)
+    except sr.UnknownValueError:
+        response = []
+    except sr.RequestError as e:
+        print(f"❌ Speech recognition service error: {e}")
+        return failed_result("Speech recognition error")
+    
+    # show_all returns [] when nothing was recognized
+    alternatives = response.get("alternative", []) if isinstance(response, dict) else []
+    if not alternatives:
+        print("❓ Could not understand what you said")
+        return failed_result("Could not understand")
+    
+    text = alternatives[0]["transcript"].strip()
+    confidence = alternatives[0].get("confidence")
+    confidence_note = f" ({confidence:.0%} confidence)" if confidence is not None else ""
+    print(f"✅ UNDERSTOOD: '{text}'{confidence_note}")
+    return {
+        "answer": text,
+        "confidence": confidence,
+        "alternatives": [a["transcript"].strip() for a in alternatives[1:]]
+    }
+
+def failed_result(answer):
+    """Recognition result for an answer that was not captured"""
+    return {"answer": answer, "confidence": None, "alternatives": []}
+
+def transcribe_audio(audio, recognizer=None, session_id=None):
+    """Transcribe captured audio with the same backend used for live answers"""
+    return recognize_answer(audio, recognizer, session_id)["answer"]
+
+def listen_for_answer(timeout=10, on_audio=None, session_id=None, device_index=None):
+    """Listen for speech input and return the recognition result with confidence"""
     try:
         recognizer = sr.Recognizer()
         
@@ -151,12 +451,12 @@ def listen_for_speech(timeout=10):
         mic_list = sr.Microphone.list_microphone_names()
         print(f"🎤 Available microphones: {len(mic_list)} found")
         
-        microphone = sr.Microphone()
+        microphone = sr.Microphone(device_index=device_index)
         
         # Faster ambient noise adjustment
         print("🔇 Quick ambient noise adjustment...")
         with microphone as source:
-            recognizer.adjust_for_ambient_noise(source, duration=0.5)
+            recognizer.adjust_for_ambient_noise(source, duration=AMBIENT_ADJUST_SECONDS)
         
         print(f"🎤 LISTENING FOR {timeout} SECONDS... SPEAK NOW!")
         print("📢 Say your answer clearly and loudly!")
@@ -166,40 +466,41 @@ def listen_for_speech(timeout=10):
             # Use shorter phrase time limit to avoid hanging
             audio = recognizer.listen(source, timeout=timeout, phrase_time_limit=8)
         
+        if on_audio is not None:
+            try:
+                on_audio(audio)
+            except Exception as e:
+                print(f"⚠️ Could not keep captured audio: {e}")
+        
         print("🔄 Processing your speech...")
-        text = recognizer.recognize_google(audio, language="en-US")
-        print(f"✅ UNDERSTOOD: '{text}'")
-        return text.strip()
+        return recognize_answer(audio, recognizer, session_id)
         
     except sr.WaitTimeoutError:
         print(f"⏰ No speech detected in {timeout} seconds")
-        return "No response (timeout)"
-    except sr.UnknownValueError:
-        print("❓ Could not understand what you said")
-        return "Could not understand"
-    except sr.RequestError as e:
-        print(f"❌ Speech recognition service error: {e}")
-        return "Speech recognition error"
+        return failed_result("No response (timeout)")
     except Exception as e:
         print(f"❌ Audio error: {e}")
-        return "Audio system error"
+        return failed_result("Audio system error")
 
-def run_single_question(question_num):
+def listen_for_speech(timeout=10, on_audio=None, session_id=None, device_index=None):
+    """Listen for speech input with better error handling and shorter timeout"""
+    return listen_for_answer(timeout, on_audio, session_id, device_index)["answer"]
+
+def run_single_question(state, question_num, reprompt_policy=None):
     """Run a single question with better error handling and timeouts"""
-    global consultation_state
-    
     if question_num >= len(QUESTIONS):
         return None
     
     question = QUESTIONS[question_num]
-    consultation_state["current_question"] = question_num + 1
-    consultation_state["last_question"] = question
+    question_started = time.time()
+    state["current_question"] = question_num + 1
+    state["last_question"] = question
     
     print(f"\n🔹 QUESTION {question_num + 1}/10 🔹")
     print(f"❓ {question}")
     
     # Update progress
-    consultation_state["progress_text"] = f"Question {question_num + 1}/10: {question}"
+    set_progress(state, f"Question {question_num + 1}/10: {question}")
     
     # Speak the question with timeout protection
     print("🗣️ About to speak question...")
@@ -216,14 +517,14 @@ def run_single_question(question_num):
         signal.signal(signal.SIGALRM, timeout_handler)
         signal.alarm(10)
         
-        speak_success = speak_text(question)
+        speak_success = speak_to_patient(state, question)
         
         signal.alarm(0)  # Cancel timeout
         
     except (TimeoutError, AttributeError):
         # AttributeError: signal not available on Windows
         print("⏰ TTS timeout or not available, using fallback...")
-        speak_success = speak_text(question)  # Try without timeout
+        speak_success = speak_to_patient(state, question)  # Try without timeout
     except Exception as e:
         print(f"❌ TTS error: {e}")
         speak_success = False
@@ -236,41 +537,86 @@ def run_single_question(question_num):
     
     # Shorter preparation countdown - CHANGED TO 1 SECOND
     print("⏳ Get ready to answer...")
-    consultation_state["progress_text"] = f"Question {question_num + 1}/10: Get ready... (1 second)"
+    set_progress(state, f"Question {question_num + 1}/10: Get ready... ({COUNTDOWN_SECONDS} second)")
     
-    for i in range(1, 0, -1):  # Changed from 2 to 1 second
+    for i in range(COUNTDOWN_SECONDS, 0, -1):
         print(f"   🔢 {i}...")
         time.sleep(1)
     
     # Clear instruction for listening
     print("🎤 SPEAK YOUR ANSWER NOW!")
-    print("📢 You have 8 seconds to respond...")
-    consultation_state["progress_text"] = f"Question {question_num + 1}/10: 🎤 LISTENING (8 seconds)"
+    print(f"📢 You have {LISTEN_TIMEOUT_SECONDS} seconds to respond...")
+    set_progress(state, f"Question {question_num + 1}/10: 🎤 LISTENING ({LISTEN_TIMEOUT_SECONDS} seconds)")
     
-    # Listen for answer with shorter timeout
-    answer = listen_for_speech(timeout=8)  # Reduced from 10 to 8 seconds
+    # Listen for answer with shorter timeout, keeping the audio for audit/re-recognition
+    session_id = state["session_id"]
+    device_index = state["microphone"]
     
-    # Record response
+    def listen_attempt(timeout):
+        captured = []
+        result = listen_for_answer(timeout=timeout, on_audio=captured.append, session_id=session_id,
+                                   device_index=device_index)
+        result["audio"] = captured[0] if captured else None
+        return result
+    
+    result = listen_attempt(LISTEN_TIMEOUT_SECONDS)
+    
+    # Re-ask right away with a short prompt instead of losing a missed or unclear answer
+    retries = 0
+    while reprompt_policy is not None and reprompt_policy.should_reprompt(result, retries):
+        reprompt_policy.record_reprompt()
+        retries += 1
+        print(f"🔁 Re-asking question {question_num + 1} ({reprompt_policy.remaining} re-prompts left)")
+        set_progress(state, f"Question {question_num + 1}/10: 🔁 Please repeat ({REPROMPT_LISTEN_SECONDS} seconds)")
+        # A timeout may mean the question was missed, so restate it briefly
+        if result["answer"] == "No response (timeout)":
+            speak_to_patient(state, NOT_HEARD_PROMPTS[question_num])
+        else:
+            speak_to_patient(state, REPEAT_PROMPT)
+        result = choose_better(result, listen_attempt(REPROMPT_LISTEN_SECONDS))
+    
+    answer = result["answer"]
+    # Audio retention is optional - a storage failure must not end the interview
+    audio_stored = False
+    if result["audio"] is not None:
+        try:
+            audio_stored = audio_store.put(session_id, question_num + 1, result["audio"])
+        except Exception as e:
+            print(f"⚠️ Could not keep captured audio: {e}")
+    
+    # Record response (stored audio is keyed by session_id + q_num)
     response_data = {
         "q_num": question_num + 1,
         "question": question,
         "answer": answer,
-        "timestamp": datetime.now().strftime("%H:%M:%S")
+        "confidence": result["confidence"],
+        "alternatives": result["alternatives"],
+        "attempts": retries + 1,
+        "timestamp": datetime.now().strftime("%H:%M:%S"),
+        "audio_stored": audio_stored
     }
     
-    consultation_state["responses"].append(response_data)
-    consultation_state["last_answer"] = answer
+    state["responses"].append(response_data)
+    state["last_answer"] = answer
     
     print(f"📝 ANSWER RECORDED: '{answer}'")
-    consultation_state["progress_text"] = f"Question {question_num + 1}/10: Recorded '{answer}'"
+    set_progress(state, f"Question {question_num + 1}/10: Recorded '{answer}'")
     
     # Give feedback on answer quality
-    if answer in ["No response (timeout)", "Could not understand", "Audio system error"]:
+    if answer in FAILED_ANSWERS:
         print(f"⚠️ Answer not captured: {answer}")
         print("💡 The consultation will continue to the next question")
     else:
         print(f"✅ Good answer captured!")
     
+    # Red-flag check: severe pain moves this session to the front
+    if question_num + 1 == PAIN_QUESTION_NUM:
+        severity = parse_pain_severity(answer)
+        if severity is not None and severity >= RED_FLAG_PAIN_SEVERITY:
+            scheduler.boost(session_id, reason=f"pain severity {severity}/10")
+    
+    scheduler.record_question(session_id, time.time() - question_started)
+    
     return response_data
 
 def generate_analytical_insights(valid_responses):
@@ -339,13 +685,9 @@ CRITICAL INSTRUCTIONS:
         print(f"❌ Analytical insights generation failed: {e}")
         return "Unable to generate analytical insights due to technical error."
 
-def generate_medical_summary():
+def generate_medical_summary(responses):
     """Generate analytical insights instead of traditional summary"""
-    responses = consultation_state["responses"]
-    valid_responses = [r for r in responses if r['answer'] not in [
-        "No response (timeout)", "Could not understand", "Audio system error", 
-        "Speech recognition error", "Audio error"
-    ]]
+    valid_responses = [r for r in responses if r['answer'] not in FAILED_ANSWERS]
     
     valid_count = len(valid_responses)
     total_count = len(responses)
@@ -358,27 +700,17 @@ def generate_medical_summary():
     # Generate intelligent medical insights using LLM
     return generate_analytical_insights(valid_responses)
 
-def start_consultation():
-    """Start consultation - returns immediate feedback"""
-    global consultation_state
-    
-    if consultation_state["is_running"]:
-        return (
-            "⚠️ Consultation Already Running",
-            consultation_state["progress_text"],
-            f"Current progress: Question {consultation_state['current_question']}/10"
-        )
-    
-    # Reset state
-    consultation_state.update({
-        "responses": [],
-        "current_question": 0,
-        "status": "starting",
-        "is_running": True,
-        "progress_text": "Starting consultation...",
-        "last_question": "",
-        "last_answer": ""
-    })
+def launch_consultation(session_id):
+    """Run an admitted consultation in the background on a free kiosk"""
+    state = new_consultation_state(session_id)
+    try:
+        state["microphone"], state["speaker"] = free_kiosks.get_nowait()
+        kiosk_taken = True
+    except Empty:
+        # The scheduler admits one session per kiosk, so this should not happen
+        print("⚠️ No free kiosk - using the default microphone and speaker")
+        kiosk_taken = False
+    active_sessions[session_id] = state
     
     # Start background consultation
     def consultation_worker():
@@ -387,90 +719,198 @@ def start_consultation():
             print("🚀 STARTING MEDICAL CONSULTATION")
             print("="*60)
             
-            consultation_state["status"] = "running"
+            state["status"] = "running"
+            publish_state(state)
             
-            # Run all questions
+            # Run all questions, sharing one re-prompt budget across the consultation
+            reprompt_policy = RepromptPolicy(REPROMPT_CONFIDENCE_THRESHOLD, REPROMPT_BUDGET)
             for i in range(len(QUESTIONS)):
-                if not consultation_state["is_running"]:
+                if not state["is_running"]:
                     break
                 
-                run_single_question(i)
+                run_single_question(state, i, reprompt_policy)
                 
                 # Small pause between questions
                 if i < len(QUESTIONS) - 1:
-                    consultation_state["progress_text"] = f"Moving to question {i + 2}/10..."
+                    set_progress(state, f"Moving to question {i + 2}/10...")
                     print("⏸️ Moving to next question...")
-                    time.sleep(2)
+                    time.sleep(PAUSE_BETWEEN_QUESTIONS_SECONDS)
             
             # Consultation complete
-            if consultation_state["is_running"]:
-                completed_count = len(consultation_state["responses"])
+            if state["is_running"]:
+                completed_count = len(state["responses"])
                 print(f"\n🏁 CONSULTATION FINISHED! ({completed_count}/{len(QUESTIONS)} questions)")
                 
                 # Thank you message
                 thank_you = f"Thank you for completing {completed_count} questions. Generating your medical summary now."
                 print(f"🗣️ {thank_you}")
-                speak_text(thank_you)
+                speak_to_patient(state, thank_you)
                 
                 # Generate summary
-                consultation_state["progress_text"] = "Generating comprehensive medical analysis..."
+                set_progress(state, "Generating comprehensive medical analysis...")
                 print("🧠 Generating medical analysis...")
-                consultation_state["summary"] = generate_medical_summary()
-                consultation_state["dashboard"] = create_physician_dashboard()
-                consultation_state["status"] = "complete"
-                consultation_state["progress_text"] = f"✅ Consultation completed! {completed_count}/10 questions answered. Check results below."
+                summary_started = time.time()
+                with scheduler.llm.slot(session_id):
+                    state["summary"] = generate_medical_summary(state["responses"])
+                scheduler.record_summary(time.time() - summary_started)
+                state["dashboard"] = create_physician_dashboard(state["responses"], state["summary"])
+                try:
+                    session_store.save_dashboard(session_id, state["dashboard"])
+                except Exception as e:
+                    print(f"⚠️ Could not share dashboard: {e}")
+                try:
+                    archive_consultation(state)
+                except Exception as e:
+                    print(f"⚠️ Could not archive consultation: {e}")
+                state["status"] = "complete"
+                set_progress(state, f"✅ Consultation completed! {completed_count}/10 questions answered. Check results below.")
                 
                 print("✅ MEDICAL ANALYSIS COMPLETE!")
                 print("✅ PHYSICIAN DASHBOARD READY!")
                 print("📊 Click 'Check Progress' to view detailed results!")
             else:
-                consultation_state["status"] = "stopped"
-                consultation_state["progress_text"] = "Consultation was stopped by user"
+                state["status"] = "stopped"
+                set_progress(state, "Consultation was stopped by user")
             
         except Exception as e:
             print(f"❌ Consultation error: {e}")
-            consultation_state["status"] = "error"
-            consultation_state["progress_text"] = f"Error: {str(e)}"
+            state["status"] = "error"
+            set_progress(state, f"Error: {str(e)}")
         finally:
-            consultation_state["is_running"] = False
+            state["is_running"] = False
+            publish_state(state)
+            active_sessions.pop(session_id, None)
+            if kiosk_taken:
+                free_kiosks.put((state["microphone"], state["speaker"]))
+            # Admit the next waiting patient
+            scheduler.finish(session_id)
     
     # Start in background thread
+    publish_state(state)
     thread = threading.Thread(target=consultation_worker, daemon=True)
     thread.start()
+
+def dispatch_consultation(session_id):
+    """Front end: route a new consultation to its sticky worker process"""
+    worker = session_store.assign_worker(session_id, CONSULTATION_WORKERS)
+    if not session_store.worker_alive(worker):
+        # Nothing would ever pick the job up - say so now rather than wait forever
+        print(f"❌ Worker {worker} is not running - consultation {session_id} not dispatched")
+        session_store.save_state(session_id, {
+            "session_id": session_id,
+            "status": "error",
+            "progress_text": f"Worker {worker} is not running. Please try again or ask staff to restart it."
+        })
+        return (
+            "❌ Worker Unavailable",
+            f"Worker {worker} is not running, so the consultation could not start. Please try again.",
+            "Not started"
+        )
+    
+    session_store.save_state(session_id, {
+        "session_id": session_id,
+        "status": "dispatched",
+        "progress_text": f"Waiting for worker {worker} to pick up the consultation..."
+    })
+    session_store.push_job(worker, {"action": "start", "session_id": session_id})
+    
+    return (
+        "📨 CONSULTATION DISPATCHED!",
+        f"The consultation was sent to worker {worker}. Click 'Check Progress' to follow it.",
+        "Waiting for the worker to start..."
+    )
+
+def submit_session(session_id):
+    """Admit a consultation in this process or queue it, recording the outcome in the session store"""
+    ticket = scheduler.submit(session_id, lambda: launch_consultation(session_id))
+    
+    if ticket["status"] == "queued" and session_id not in active_sessions:
+        session_store.save_state(session_id, {
+            "session_id": session_id,
+            "status": "queued",
+            "progress_text": f"Position {ticket['position']} in the waiting queue. Estimated wait: ~{ticket['eta_seconds'] / 60:.0f} min."
+        })
+    elif ticket["status"] == "rejected":
+        session_store.save_state(session_id, {
+            "session_id": session_id,
+            "status": "rejected",
+            "progress_text": f"{MAX_WAITING_PATIENTS} patients are already waiting. Please try again shortly."
+        })
+    return ticket
+
+def start_consultation():
+    """Start consultation or queue it behind the running one - returns immediate feedback and the client's session id"""
+    session_id = datetime.now().strftime("%Y%m%d-%H%M%S-%f")
+    if CONSULTATION_WORKERS > 0:
+        return dispatch_consultation(session_id) + (session_id,)
+    
+    ticket = submit_session(session_id)
+    
+    if ticket["status"] == "rejected":
+        return (
+            "⛔ Waiting Queue Full",
+            f"{MAX_WAITING_PATIENTS} patients are already waiting. Please try again shortly.",
+            "Not started",
+            ""
+        )
+    
+    if ticket["status"] == "queued":
+        wait_minutes = ticket["eta_seconds"] / 60
+        return (
+            "⏳ Patient Added to Queue",
+            f"Position {ticket['position']} in the waiting queue. Estimated wait: ~{wait_minutes:.0f} min.",
+            "The consultation will start automatically when the kiosk is free.",
+            session_id
+        )
     
     return (
         "🚀 CONSULTATION STARTED!",
         "The automatic consultation has begun. Watch the progress below and listen for questions.",
-        "Question 1/10 will begin shortly..."
+        "Question 1/10 will begin shortly...",
+        session_id
     )
 
-def check_progress():
-    """Check current consultation progress"""
-    global consultation_state
+def check_progress(session_id):
+    """Check the progress of this client's consultation"""
+    # Every session publishes its state to the store, whichever process runs it
+    state = session_store.load_state(session_id) if session_id else None
+    if state is None:
+        state = {"status": "ready"}
+    
+    status = state.get("status", "ready")
+    current_q = state.get("current_question", 0)
+    total_responses = len(state.get("responses", []))
     
-    status = consultation_state["status"]
-    current_q = consultation_state["current_question"]
-    total_responses = len(consultation_state["responses"])
+    waiting_on_worker = status in ("dispatched", "queued") or (state.get("is_running") and status != "complete")
+    if CONSULTATION_WORKERS > 0 and waiting_on_worker:
+        # A worker that died leaves its sessions waiting or running forever in the store
+        worker = session_store.assign_worker(session_id, CONSULTATION_WORKERS)
+        if not session_store.worker_alive(worker):
+            status = "error"
+            state = {**state, "progress_text": f"Worker {worker} stopped responding while handling this consultation."}
     
     # Build progress display
     if status == "complete":
         return (
             "🏁 CONSULTATION COMPLETE!",
-            consultation_state["dashboard"],
+            state.get("dashboard") or session_store.load_dashboard(state["session_id"]) or "",
             f"✅ All {total_responses} questions completed successfully!"
         )
     
-    elif status == "running" or consultation_state["is_running"]:
+    elif status == "running" or state.get("is_running"):
         # Real-time progress
+        queue = state.get("queue") or scheduler.snapshot()
         progress_display = f"""🔄 **Consultation Active**
 
 📋 **Current Status:**
 • Question: {current_q}/10
 • Completed: {total_responses}/10 responses recorded
-• Last Question: {consultation_state.get('last_question', 'Starting...')}  
-• Last Answer: {consultation_state.get('last_answer', 'Waiting...')}
+• Last Question: {state.get('last_question', 'Starting...')}  
+• Last Answer: {state.get('last_answer', 'Waiting...')}
 
-⏳ **Current Activity:** {consultation_state['progress_text']}
+⏳ **Current Activity:** {state['progress_text']}
+
+👥 **Waiting Queue:** {queue['waiting']} patient(s) (next start in ~{queue['next_eta_seconds'] / 60:.0f} min)
 
 🎯 **What to do:**
 - Listen for questions (they're being spoken aloud)
@@ -483,7 +923,28 @@ def check_progress():
         return (
             f"🔄 Question {current_q}/10 Running...",
             progress_display,
-            consultation_state['progress_text']
+            state['progress_text']
+        )
+    
+    elif status in ("dispatched", "queued"):
+        return (
+            "⏳ Waiting to Start",
+            state.get("progress_text", "Waiting for a free kiosk..."),
+            "Queued"
+        )
+    
+    elif status == "stopped":
+        return (
+            "🛑 Consultation Stopped",
+            state.get("progress_text", "Consultation was stopped by user"),
+            f"Stopped - {total_responses} questions answered"
+        )
+    
+    elif status == "rejected":
+        return (
+            "⛔ Waiting Queue Full",
+            state.get("progress_text", "Please try again shortly."),
+            "Not started"
         )
     
     elif status == "error":
@@ -492,7 +953,7 @@ def check_progress():
             f"""⚠️ **Consultation Error**
 
 🔧 **What went wrong:**
-{consultation_state.get('progress_text', 'Unknown error')}
+{state.get('progress_text', 'Unknown error')}
 
 💡 **Solutions:**
 • Check microphone permissions
@@ -512,11 +973,54 @@ def check_progress():
             "Ready to start"
         )
 
-def stop_consultation():
-    """Stop the running consultation"""
-    global consultation_state
-    consultation_state["is_running"] = False
-    consultation_state["status"] = "stopped"
+def stop_session(session_id):
+    """Stop a consultation running in this process or take it out of the waiting queue
+
+    Returns "stopped", "left_queue", or None if the session is neither running nor waiting.
+    """
+    state = active_sessions.get(session_id)
+    if state is not None and state["is_running"]:
+        state["is_running"] = False
+        state["status"] = "stopped"
+        publish_state(state)
+        return "stopped"
+    
+    if scheduler.cancel(session_id):
+        session_store.save_state(session_id, {
+            "session_id": session_id,
+            "status": "stopped",
+            "progress_text": "Patient left the waiting queue"
+        })
+        return "left_queue"
+    return None
+
+def stop_consultation(session_id):
+    """Stop this client's consultation"""
+    if not session_id:
+        return (
+            "❓ No Active Consultation",
+            "There is no consultation to stop.",
+            "Ready to start"
+        )
+    
+    if CONSULTATION_WORKERS > 0:
+        # Front end: ask the session's sticky worker to stop it
+        worker = session_store.assign_worker(session_id, CONSULTATION_WORKERS)
+        session_store.push_job(worker, {"action": "stop", "session_id": session_id})
+    else:
+        outcome = stop_session(session_id)
+        if outcome == "left_queue":
+            return (
+                "🚪 Left the Queue",
+                "The patient was removed from the waiting queue.",
+                "Stopped"
+            )
+        if outcome is None:
+            return (
+                "❓ No Active Consultation",
+                "This consultation is no longer running.",
+                "Ready to start"
+            )
     
     return (
         "🛑 Consultation Stopped", 
@@ -524,38 +1028,77 @@ def stop_consultation():
         "Stopped"
     )
 
-def create_physician_dashboard():
+def data_quality_tier(valid_count):
+    """Data quality tier (GOOD/FAIR/POOR) from the number of valid answers (Set Threshold)"""
+    if valid_count >= 7:
+        return "GOOD"
+    elif valid_count >= 4:
+        return "FAIR"
+    return "POOR"
+
+def archive_consultation(state):
+    """Add a completed consultation to the searchable archive"""
+    valid_responses = [r for r in state["responses"] if r['answer'] not in FAILED_ANSWERS]
+    # No dashboard: it repeats these fields and would double every record
+    consultation_archive.add({
+        "session_id": state["session_id"],
+        "recorded_at": datetime.now().isoformat(timespec="seconds"),
+        "quality": data_quality_tier(len(valid_responses)),
+        "answers": {r["q_num"]: r["answer"] for r in valid_responses},
+        "summary": state["summary"]
+    })
+
+def search_consultations(query):
+    """Search archived consultations - returns markdown results"""
+    if not query.strip():
+        return "Enter a search such as `q7:yes q8:yes`, `fever quality:good` or `date:2026-10-19 head*`."
+    
+    try:
+        total, results = consultation_archive.search(query)
+    except ValueError as e:
+        return f"⚠️ Invalid search: {e}"
+    
+    if total == 0:
+        return "No matching consultations found."
+    
+    output = f"### 🔎 {total} matching consultation(s)"
+    if total > len(results):
+        output += f" - showing the {len(results)} most recent"
+    output += "\n\n"
+    
+    for doc in results:
+        record = consultation_archive.get(doc["doc_id"])
+        quality = QUALITY_BADGES.get(doc["quality"], doc["quality"])
+        output += f"**{doc['date']}** · Session `{doc['session_id']}` · {quality} · {doc['answered']}/10 answered\n"
+        for q_num, answer in record["answers"].items():
+            output += f"- Q{q_num}: {answer}\n"
+        output += "\n"
+    
+    return output
+
+def create_physician_dashboard(responses, summary, recorded_at=None):
     """Create streamlined physician dashboard with analytical insights"""
-    responses = consultation_state["responses"]
-    valid_responses = [r for r in responses if r['answer'] not in [
-        "No response (timeout)", "Could not understand", "Audio system error", 
-        "Speech recognition error", "Audio error"
-    ]]
+    if recorded_at is None:
+        recorded_at = datetime.now()
+    valid_responses = [r for r in responses if r['answer'] not in FAILED_ANSWERS]
     
     valid_count = len(valid_responses)
     total_count = len(responses)
     
-    # Determine data quality status (Set Threhold)
-    if valid_count >= 7:
-        quality_status = "🟢 GOOD"
-        completion_rate = f"{(valid_count/total_count)*100:.0f}%"
-    elif valid_count >= 4:
-        quality_status = "🟡 FAIR" 
-        completion_rate = f"{(valid_count/total_count)*100:.0f}%"
-    else:
-        quality_status = "🔴 POOR"
-        completion_rate = f"{(valid_count/total_count)*100:.0f}%"
+    # Determine data quality status
+    quality_status = QUALITY_BADGES[data_quality_tier(valid_count)]
+    completion_rate = f"{(valid_count/total_count)*100:.0f}%"
     
     dashboard = f"""# 🏥 PHYSICIAN CONSULTATION DASHBOARD
 
 ## 📊 CONSULTATION SUMMARY
-- **Date:** {datetime.now().strftime('%B %d, %Y at %I:%M %p')}
+- **Date:** {recorded_at.strftime('%B %d, %Y at %I:%M %p')}
 - **Data Quality:** {quality_status}
 - **Completion Rate:** {completion_rate} ({valid_count}/{total_count} responses)
 
 ---
 
-## {consultation_state['summary']}
+## {summary}
 
 ---
 
@@ -569,19 +1112,21 @@ def create_physician_dashboard():
     else:
         for r in valid_responses:
             dashboard += f"**Q{r['q_num']}:** {r['question']}\n"
-            dashboard += f"**Answer:** {r['answer']}\n"
+            confidence = r.get("confidence")
+            if confidence is not None and confidence < REPROMPT_CONFIDENCE_THRESHOLD:
+                dashboard += f"**Answer:** {r['answer']} *(⚠️ low recognition confidence: {confidence:.0%})*\n"
+            else:
+                dashboard += f"**Answer:** {r['answer']}\n"
             dashboard += f"*Time: {r['timestamp']}*\n\n"
     
     # Show failed responses only if there are any
-    failed_responses = [r for r in responses if r['answer'] in [
-        "No response (timeout)", "Could not understand", "Audio system error", 
-        "Speech recognition error", "Audio error"
-    ]]
+    failed_responses = [r for r in responses if r['answer'] in FAILED_ANSWERS]
     
     if failed_responses:
         dashboard += f"### ❌ FAILED TO CAPTURE ({len(failed_responses)} questions):\n"
         for r in failed_responses:
-            dashboard += f"**Q{r['q_num']}:** {r['question']} → {r['answer']}\n"
+            audio_note = " (🎧 audio retained)" if r.get("audio_stored") else ""
+            dashboard += f"**Q{r['q_num']}:** {r['question']} → {r['answer']}{audio_note}\n"
     
     dashboard += f"""
 
@@ -677,22 +1222,38 @@ def create_gradio_interface():
         with gr.Row():
             results_display = gr.Markdown("### 📋 Results will appear here after consultation")
         
+        # This browser client's consultation
+        session_state = gr.State("")
+        
         # Event handlers
         start_btn.click(
             fn=start_consultation,
-            outputs=[status_title, status_display, progress_display]
+            outputs=[status_title, status_display, progress_display, session_state]
         )
         
         progress_btn.click(
             fn=check_progress,
+            inputs=session_state,
             outputs=[status_title, results_display, progress_display]
         )
         
         stop_btn.click(
             fn=stop_consultation,
+            inputs=session_state,
             outputs=[status_title, status_display, progress_display]  
         )
         
+        # Search completed consultations
+        with gr.Accordion("🔎 Search Past Consultations", open=False):
+            gr.Markdown("Search answers and insights, e.g. `q7:yes q8:yes`, `q3:head*`, `fever date:2026-10-19`, `quality:poor`.")
+            with gr.Row():
+                search_box = gr.Textbox(label="Search", placeholder="q7:yes q8:yes", scale=4)
+                search_btn = gr.Button("🔎 Search", variant="secondary", scale=1)
+            search_results = gr.Markdown()
+            
+            search_btn.click(fn=search_consultations, inputs=search_box, outputs=search_results)
+            search_box.submit(fn=search_consultations, inputs=search_box, outputs=search_results)
+        
         # Questions preview
         with gr.Accordion("📋 Question Preview (3-Question Test)", open=False):
             questions_preview = "\n".join([f"{i+1}. {q}" for i, q in enumerate(QUESTIONS)])
@@ -745,6 +1306,8 @@ def main():
     except Exception as e:
         print(f"   ❌ TTS Error: {e}")
     
+    prerender_prompts()
+    
     # Test speech recognition
     try:
         r = sr.Recognizer()
@@ -758,6 +1321,17 @@ def main():
     eleven_status = "✅ Configured" if ELEVENLAB_API_KEY and ELEVENLAB_API_KEY.strip() else "⚪ Not configured"
     print(f"   🤖 Groq AI: {groq_status}")
     print(f"   🔊 ElevenLabs: {eleven_status}")
+    if KIOSK_DEVICES:
+        devices = ", ".join(f"mic {i}/speaker {o}" for i, o in KIOSK_DEVICES)
+        print(f"   🎤 Kiosks: {len(KIOSK_DEVICES)} ({devices}) - up to {MAX_ACTIVE_CONSULTATIONS} consultations at once")
+    else:
+        print("   🎤 Kiosks: 1 (default microphone and speaker) - one consultation at a time, others wait in the queue")
+    if CONSULTATION_WORKERS > 0:
+        if SESSION_STORE_URL.startswith("memory"):
+            print(f"   ❌ CONSULTATION_WORKERS={CONSULTATION_WORKERS} needs a shared session store - "
+                  "memory:// is private to each process. Set SESSION_STORE_URL to a redis:// URL")
+            return 1
+        print(f"   👷 Workers: {CONSULTATION_WORKERS} via {SESSION_STORE_URL}")
     
     print("")
     print("🚀 Starting web interface...")
@@ -793,7 +1367,61 @@ def main():
         except Exception as e:
             print(f"❌ Could not start interface: {e}")
 
+def handle_worker_job(job):
+    """Worker: start or stop a consultation routed here by the front end"""
+    session_id = job["session_id"]
+    
+    if job["action"] == "start":
+        submit_session(session_id)
+    
+    elif job["action"] == "stop":
+        # Stop it here - stop_consultation() would route it back to a worker
+        stop_session(session_id)
+
+def worker_devices(worker_index, spec=None):
+    """This worker's kiosks: the command-line devices, else KIOSK_DEVICES_<index>"""
+    # Not the shared KIOSK_DEVICES - every worker on a host loads the same .env
+    # and would open the same microphones and speakers
+    if spec is None:
+        spec = os.environ.get(f"KIOSK_DEVICES_{worker_index}", "")
+    return parse_kiosk_devices(spec)
+
+def worker_main(worker_index, devices_spec=None):
+    """Run consultations routed to this worker process"""
+    global CONSULTATION_WORKERS
+    if SESSION_STORE_URL.startswith("memory"):
+        print("❌ A worker needs a shared session store - memory:// is private to each process. "
+              "Set SESSION_STORE_URL to a redis:// URL")
+        return 1
+    # CONSULTATION_WORKERS configures the front end; a worker runs its consultations itself
+    CONSULTATION_WORKERS = 0
+    try:
+        configure_kiosks(worker_devices(worker_index, devices_spec))
+    except ValueError as e:
+        print(f"❌ {e}")
+        return 1
+    
+    print(f"🏥 CONSULTATION WORKER {worker_index} ({SESSION_STORE_URL})")
+    if KIOSK_DEVICES:
+        devices = ", ".join(f"mic {i}/speaker {o}" for i, o in KIOSK_DEVICES)
+        print(f"   🎤 Kiosks: {devices}")
+    else:
+        print(f"   🎤 Kiosks: default microphone and speaker - run one such worker per host, "
+              f"or pass devices: python main.py worker {worker_index} <mic>:<speaker>[,...]")
+    prerender_prompts()
+    serve_jobs(session_store, worker_index, handle_worker_job)
+    return 0
+
+def batch_main(argv=None):
+    """Headless batch re-processing of recorded consultations"""
+    from batch_reprocess import run_batch_cli
+    return run_batch_cli(argv)
+
 if __name__ == "__main__":
-    main()
+    if len(sys.argv) > 1 and sys.argv[1] == "batch":
+        sys.exit(batch_main(sys.argv[2:]))
+    if len(sys.argv) > 2 and sys.argv[1] == "worker":
+        sys.exit(worker_main(int(sys.argv[2]), sys.argv[3] if len(sys.argv) > 3 else None))
+    sys.exit(main())
 
 
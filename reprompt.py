@@ -0,0 +1,60 @@
+"""
+Confidence-aware re-prompt policy for spoken answers.
+
+When an answer is not understood, times out, or is recognized with low
+confidence, the question is re-asked right away with a short prompt instead
+of recording a failed answer. A per-consultation budget bounds how much
+extra patient time retries can cost.
+
+A recognition result is a dict: {"answer", "confidence", "alternatives"},
+plus the captured "audio" when there is any. "confidence" is None when the
+recognizer does not report one.
+"""
+
+# Failures worth asking again; service and audio-system errors are not
+RETRYABLE_ANSWERS = ["No response (timeout)", "Could not understand"]
+
+UNCAPTURED_ANSWERS = RETRYABLE_ANSWERS + ["Audio system error", "Speech recognition error", "Audio error"]
+
+def is_captured(result):
+    return result["answer"] not in UNCAPTURED_ANSWERS
+
+def is_low_confidence(result, threshold):
+    return result["confidence"] is not None and result["confidence"] < threshold
+
+def choose_better(first, second):
+    """Keep the more useful of two attempts at the same question"""
+    if is_captured(first) != is_captured(second):
+        return first if is_captured(first) else second
+    if not is_captured(second):
+        # Neither was captured: keep whichever has audio, so it can be reviewed or re-recognized
+        if first.get("audio") is not None and second.get("audio") is None:
+            return first
+        return second
+
+    # Both captured: prefer the more confident; an unknown confidence beats a known low one
+    first_confidence = 1.0 if first["confidence"] is None else first["confidence"]
+    second_confidence = 1.0 if second["confidence"] is None else second["confidence"]
+    return first if first_confidence > second_confidence else second
+
+class RepromptPolicy:
+    """Decides when to re-ask a question, within a per-consultation retry budget"""
+
+    def __init__(self, confidence_threshold=0.4, budget=3, max_per_question=1):
+        self.confidence_threshold = confidence_threshold
+        self.budget = budget
+        self.max_per_question = max_per_question
+        self.used = 0
+
+    @property
+    def remaining(self):
+        return self.budget - self.used
+
+    def should_reprompt(self, result, retries_for_question):
+        """True if the question should be re-asked after this result"""
+        if self.remaining <= 0 or retries_for_question >= self.max_per_question:
+            return False
+        return result["answer"] in RETRYABLE_ANSWERS or is_low_confidence(result, self.confidence_threshold)
+
+    def record_reprompt(self):
+        self.used += 1
@@ -0,0 +1,239 @@
+"""
+Admission scheduling for consultations.
+
+ConsultationScheduler sits in front of consultation startup:
+- admits up to max_active sessions and holds the rest in a bounded,
+  priority-ordered waiting queue
+- estimates waiting time from measured per-question and summary durations
+- shares the limited speech-to-text and LLM concurrency (FairSlots) across
+  active sessions, so one session cannot starve the others
+- boosts a session's priority when an early answer looks urgent, moving it
+  ahead both in the waiting queue and for STT/LLM slots
+"""
+import heapq
+import itertools
+import threading
+import time
+from collections import defaultdict, deque
+from contextlib import contextmanager
+
+# Admissions whose queue wait is kept in stats["queue_waits"], most recent last
+QUEUE_WAIT_HISTORY = 500
+
+class FairSlots:
+    """Limited concurrency resource shared fairly across sessions
+
+    A free slot goes to the waiter with the highest priority, then to the
+    session that has been granted the fewest slots so far, then first come.
+    """
+
+    def __init__(self, name, slots, priority_fn):
+        self.name = name
+        self.slots = slots
+        self._priority = priority_fn
+        self._free = slots
+        self._cond = threading.Condition()
+        self._seq = itertools.count()
+        self._waiting = []  # (session_id, seq)
+        self._granted = defaultdict(int)
+
+    def _next_waiter(self):
+        return min(self._waiting, key=lambda w: (-self._priority(w[0]), self._granted[w[0]], w[1]))
+
+    def acquire(self, session_id):
+        with self._cond:
+            waiter = (session_id, next(self._seq))
+            self._waiting.append(waiter)
+            while not (self._free > 0 and self._next_waiter() == waiter):
+                self._cond.wait()
+            self._waiting.remove(waiter)
+            self._free -= 1
+            self._granted[session_id] += 1
+
+    def release(self, session_id):
+        with self._cond:
+            self._free += 1
+            self._cond.notify_all()
+
+    @contextmanager
+    def slot(self, session_id):
+        self.acquire(session_id)
+        try:
+            yield
+        finally:
+            self.release(session_id)
+
+    def reprioritize(self):
+        """Wake waiters so a priority change takes effect immediately"""
+        with self._cond:
+            self._cond.notify_all()
+
+    def forget(self, session_id):
+        with self._cond:
+            self._granted.pop(session_id, None)
+
+class ConsultationScheduler:
+    """Bounded waiting queue and capacity model for consultation sessions"""
+
+    def __init__(self, max_active=1, max_waiting=10, stt_slots=1, llm_slots=1,
+                 questions_per_session=10, default_question_seconds=15.0,
+                 default_summary_seconds=5.0, smoothing=0.2):
+        self.max_active = max_active
+        self.max_waiting = max_waiting
+        self.questions_per_session = questions_per_session
+        self.smoothing = smoothing
+
+        self._lock = threading.Lock()
+        self._seq = itertools.count()
+        self._waiting = []  # heap of (-priority, seq, session_id)
+        self._queued = {}  # session_id -> (start_fn, enqueued_at)
+        self._active = {}  # session_id -> questions completed
+        self._priority = defaultdict(int)
+
+        # Exponentially weighted moving averages of measured durations
+        self._question_seconds = default_question_seconds
+        self._summary_seconds = default_summary_seconds
+
+        # queue_waits holds only recent admissions, so a long-running kiosk does
+        # not grow it forever; queue_wait_total covers every admission
+        self.stats = {"admitted": 0, "completed": 0, "rejected": 0, "boosted": 0,
+                      "queue_waits": deque(maxlen=QUEUE_WAIT_HISTORY), "queue_wait_total": 0.0}
+
+        self.stt = FairSlots("STT", stt_slots, self.priority)
+        self.llm = FairSlots("LLM", llm_slots, self.priority)
+
+    def priority(self, session_id):
+        return self._priority.get(session_id, 0)
+
+    def submit(self, session_id, start_fn, priority=0):
+        """Admit a session now or queue it
+
+        Returns a ticket dict: status is "started", "queued" (with position
+        and eta_seconds) or "rejected" when the waiting queue is full.
+        """
+        with self._lock:
+            if len(self._active) < self.max_active and not self._waiting:
+                self._active[session_id] = 0
+                self._priority[session_id] = priority
+                self._record_admission_locked(0.0)
+                ticket = {"status": "started", "position": 0, "eta_seconds": 0.0}
+            elif len(self._waiting) >= self.max_waiting:
+                self.stats["rejected"] += 1
+                return {"status": "rejected", "position": None, "eta_seconds": None}
+            else:
+                self._priority[session_id] = priority
+                self._queued[session_id] = (start_fn, time.monotonic())
+                heapq.heappush(self._waiting, (-priority, next(self._seq), session_id))
+                position = self._position_locked(session_id)
+                return {
+                    "status": "queued",
+                    "position": position + 1,
+                    "eta_seconds": self._estimate_wait_locked(position)
+                }
+
+        start_fn()
+        return ticket
+
+    def finish(self, session_id):
+        """Mark a session finished and admit waiting sessions into free capacity"""
+        to_start = []
+        with self._lock:
+            if self._active.pop(session_id, None) is not None:
+                self.stats["completed"] += 1
+            self._priority.pop(session_id, None)
+
+            while self._waiting and len(self._active) < self.max_active:
+                _, _, next_id = heapq.heappop(self._waiting)
+                start_fn, enqueued_at = self._queued.pop(next_id)
+                self._active[next_id] = 0
+                self._record_admission_locked(time.monotonic() - enqueued_at)
+                to_start.append(start_fn)
+
+        self.stt.forget(session_id)
+        self.llm.forget(session_id)
+        for start_fn in to_start:
+            start_fn()
+
+    def cancel(self, session_id):
+        """Remove a session from the waiting queue"""
+        with self._lock:
+            if self._queued.pop(session_id, None) is None:
+                return False
+            self._waiting = [w for w in self._waiting if w[2] != session_id]
+            heapq.heapify(self._waiting)
+            self._priority.pop(session_id, None)
+            return True
+
+    def boost(self, session_id, amount=1, reason=""):
+        """Raise a session's priority for queueing and STT/LLM slots"""
+        with self._lock:
+            self._priority[session_id] += amount
+            self.stats["boosted"] += 1
+            if session_id in self._queued:
+                self._waiting = [
+                    (-self._priority[s], seq, s) for _, seq, s in self._waiting
+                ]
+                heapq.heapify(self._waiting)
+
+        print(f"🚨 Priority boosted for session {session_id}" + (f": {reason}" if reason else ""))
+        self.stt.reprioritize()
+        self.llm.reprioritize()
+
+    def record_question(self, session_id, seconds):
+        """Record a measured question duration for wait estimates"""
+        with self._lock:
+            self._question_seconds += self.smoothing * (seconds - self._question_seconds)
+            if session_id in self._active:
+                self._active[session_id] += 1
+
+    def record_summary(self, seconds):
+        """Record a measured summary generation duration for wait estimates"""
+        with self._lock:
+            self._summary_seconds += self.smoothing * (seconds - self._summary_seconds)
+
+    def _record_admission_locked(self, queue_wait):
+        self.stats["admitted"] += 1
+        self.stats["queue_waits"].append(queue_wait)
+        self.stats["queue_wait_total"] += queue_wait
+
+    def _position_locked(self, session_id):
+        order = [s for _, _, s in sorted(self._waiting)]
+        return order.index(session_id)
+
+    def _estimate_wait_locked(self, position):
+        free = self.max_active - len(self._active)
+        if position < free:
+            return 0.0
+
+        full_session = self.questions_per_session * self._question_seconds + self._summary_seconds
+        # When each active session will free its slot
+        slots = [
+            max(0, self.questions_per_session - done) * self._question_seconds + self._summary_seconds
+            for done in self._active.values()
+        ]
+        slots += [0.0] * free
+        heapq.heapify(slots)
+
+        # Everyone ahead takes the earliest slot in turn, free ones included
+        wait = 0.0
+        for _ in range(position + 1):
+            wait = heapq.heappop(slots)
+            heapq.heappush(slots, wait + full_session)
+        return wait
+
+    def estimate_wait(self, position):
+        """Estimated seconds until the session at 0-based queue position starts"""
+        with self._lock:
+            return self._estimate_wait_locked(position)
+
+    def snapshot(self):
+        """Current queue state for display"""
+        with self._lock:
+            waiting = [s for _, _, s in sorted(self._waiting)]
+            return {
+                "active": len(self._active),
+                "waiting": len(waiting),
+                "next_eta_seconds": self._estimate_wait_locked(0) if waiting else 0.0,
+                "question_seconds": self._question_seconds,
+                "summary_seconds": self._summary_seconds
+            }
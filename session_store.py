@@ -0,0 +1,313 @@
+"""
+Shared consultation session state for running several worker processes.
+
+Session state snapshots, progress events, completed dashboards, sticky
+worker assignments and per-worker job queues live behind one small store
+interface with two backends:
+
+- InMemorySessionStore ("memory://"): the default, for a single process
+- RedisSessionStore ("redis://host:port/db"): shared across processes and
+  machines; speaks the Redis protocol directly, so no client library is needed
+
+Front end and workers exchange jobs through push_job()/pop_job(). Each
+session is pinned to one worker (assign_worker) so every follow-up action
+for it reaches the process that owns its consultation thread. Workers send a
+heartbeat() while they serve jobs; the front end checks worker_alive()
+before routing to a worker and while a session waits on one.
+"""
+import hashlib
+import json
+import socket
+import threading
+import time
+from collections import defaultdict, deque
+from urllib.parse import urlparse
+
+SESSION_TTL_SECONDS = 24 * 60 * 60
+# A worker that has not sent a heartbeat for this long is treated as down
+HEARTBEAT_TTL_SECONDS = 10
+KEY_PREFIX = "consult"
+
+# Commands that leave the same result when sent twice, so they are safe to
+# retry after a connection failure even if the server may have run them
+IDEMPOTENT_COMMANDS = {"AUTH", "SELECT", "PING", "GET", "SET", "EXPIRE", "LRANGE"}
+
+def pick_worker(session_id, worker_count):
+    """Stable worker index for a session (rendezvous hashing)"""
+    def weight(worker):
+        return hashlib.sha1(f"{worker}:{session_id}".encode()).digest()
+    return max(range(worker_count), key=weight)
+
+class InMemorySessionStore:
+    """Process-local session store (default)
+
+    Like the Redis keys, a session's data expires ttl_seconds after it was
+    last written, so a long-running kiosk does not keep every session.
+    """
+
+    def __init__(self, ttl_seconds=SESSION_TTL_SECONDS, heartbeat_ttl_seconds=HEARTBEAT_TTL_SECONDS):
+        self.ttl_seconds = ttl_seconds
+        self.heartbeat_ttl_seconds = heartbeat_ttl_seconds
+        self._lock = threading.Condition()
+        self._states = {}
+        self._events = defaultdict(list)
+        self._dashboards = {}
+        self._workers = {}
+        self._expires = {}  # session_id -> monotonic deadline
+        self._next_prune = 0.0
+        self._jobs = defaultdict(deque)
+        self._heartbeats = {}
+
+    def _touch_locked(self, session_id):
+        """Extend a session's expiry after a write, and drop expired sessions now and then"""
+        now = time.monotonic()
+        self._expires[session_id] = now + self.ttl_seconds
+        if now >= self._next_prune:
+            self._next_prune = now + min(self.ttl_seconds, 60)
+            for expired in [s for s, deadline in self._expires.items() if deadline <= now]:
+                self._forget_locked(expired)
+
+    def _live_locked(self, session_id):
+        """False once a session has expired - it is forgotten on the spot"""
+        deadline = self._expires.get(session_id)
+        if deadline is not None and deadline <= time.monotonic():
+            self._forget_locked(session_id)
+            return False
+        return True
+
+    def _forget_locked(self, session_id):
+        for table in (self._states, self._events, self._dashboards, self._workers, self._expires):
+            table.pop(session_id, None)
+
+    def save_state(self, session_id, state):
+        with self._lock:
+            self._states[session_id] = json.loads(json.dumps(state))
+            self._touch_locked(session_id)
+
+    def load_state(self, session_id):
+        with self._lock:
+            state = self._states.get(session_id) if self._live_locked(session_id) else None
+            return json.loads(json.dumps(state)) if state is not None else None
+
+    def publish_event(self, session_id, text):
+        with self._lock:
+            self._live_locked(session_id)
+            self._events[session_id].append({"time": time.time(), "text": text})
+            self._touch_locked(session_id)
+
+    def events(self, session_id, start=0):
+        with self._lock:
+            if not self._live_locked(session_id):
+                return []
+            return list(self._events.get(session_id, [])[start:])
+
+    def save_dashboard(self, session_id, dashboard):
+        with self._lock:
+            self._dashboards[session_id] = dashboard
+            self._touch_locked(session_id)
+
+    def load_dashboard(self, session_id):
+        with self._lock:
+            return self._dashboards.get(session_id) if self._live_locked(session_id) else None
+
+    def assign_worker(self, session_id, worker_count):
+        with self._lock:
+            self._live_locked(session_id)
+            if session_id not in self._workers:
+                self._workers[session_id] = pick_worker(session_id, worker_count)
+                self._touch_locked(session_id)
+            return self._workers[session_id]
+
+    def push_job(self, worker_index, job):
+        with self._lock:
+            self._jobs[worker_index].append(job)
+            self._lock.notify_all()
+
+    def pop_job(self, worker_index, timeout=1.0):
+        with self._lock:
+            if not self._jobs[worker_index]:
+                self._lock.wait(timeout)
+            if self._jobs[worker_index]:
+                return self._jobs[worker_index].popleft()
+            return None
+
+    def heartbeat(self, worker_index):
+        with self._lock:
+            self._heartbeats[worker_index] = time.monotonic()
+
+    def worker_alive(self, worker_index):
+        with self._lock:
+            last = self._heartbeats.get(worker_index)
+            return last is not None and time.monotonic() - last < self.heartbeat_ttl_seconds
+
+class RedisError(Exception):
+    """Error reply from the Redis server"""
+
+class _NotSentError(ConnectionError):
+    """The connection failed before the whole command was sent"""
+
+class _RedisConnection:
+    """Minimal Redis protocol (RESP) connection"""
+
+    def __init__(self, host, port, db=0, password=None, connect_timeout=5.0):
+        self.sock = socket.create_connection((host, port), timeout=connect_timeout)
+        # Blocking commands (BLPOP) wait server-side, so reads must not time out
+        self.sock.settimeout(None)
+        self.reader = self.sock.makefile("rb")
+        if password:
+            self.execute("AUTH", password)
+        if db:
+            self.execute("SELECT", db)
+
+    def execute(self, *args):
+        parts = [b"*%d\r\n" % len(args)]
+        for arg in args:
+            data = arg if isinstance(arg, bytes) else str(arg).encode()
+            parts.append(b"$%d\r\n%s\r\n" % (len(data), data))
+        try:
+            self.sock.sendall(b"".join(parts))
+        except OSError as e:
+            # The server discards a partial command when the connection drops
+            raise _NotSentError(str(e)) from e
+        return self._read_reply()
+
+    def _read_reply(self):
+        line = self.reader.readline()
+        if not line:
+            raise ConnectionError("Redis connection closed")
+        kind, payload = line[:1], line[1:-2]
+
+        if kind == b"+":
+            return payload.decode()
+        if kind == b"-":
+            raise RedisError(payload.decode())
+        if kind == b":":
+            return int(payload)
+        if kind == b"$":
+            length = int(payload)
+            if length == -1:
+                return None
+            return self.reader.read(length + 2)[:-2]
+        if kind == b"*":
+            length = int(payload)
+            if length == -1:
+                return None
+            return [self._read_reply() for _ in range(length)]
+        raise RedisError(f"Unexpected reply: {line!r}")
+
+    def close(self):
+        try:
+            self.reader.close()
+            self.sock.close()
+        except OSError:
+            pass
+
+class RedisSessionStore:
+    """Session store shared through a Redis-protocol server"""
+
+    def __init__(self, url="redis://localhost:6379/0", ttl_seconds=SESSION_TTL_SECONDS, prefix=KEY_PREFIX,
+                 heartbeat_ttl_seconds=HEARTBEAT_TTL_SECONDS):
+        parsed = urlparse(url)
+        self.host = parsed.hostname or "localhost"
+        self.port = parsed.port or 6379
+        self.db = int(parsed.path.lstrip("/") or 0)
+        self.password = parsed.password
+        self.ttl_seconds = ttl_seconds
+        self.heartbeat_ttl_seconds = heartbeat_ttl_seconds
+        self.prefix = prefix
+        self._local = threading.local()  # one connection per thread
+
+    def _execute(self, *args):
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = _RedisConnection(self.host, self.port, self.db, self.password)
+            self._local.conn = conn
+        try:
+            return conn.execute(*args)
+        except (ConnectionError, OSError) as e:
+            conn.close()
+            self._local.conn = None
+            # The server may have run a command whose reply was lost; re-sending
+            # RPUSH or BLPOP would duplicate or drop a job
+            if not isinstance(e, _NotSentError) and str(args[0]).upper() not in IDEMPOTENT_COMMANDS:
+                raise
+            # Reconnect once - the server may have restarted or dropped an idle connection
+            self._local.conn = _RedisConnection(self.host, self.port, self.db, self.password)
+            return self._local.conn.execute(*args)
+
+    def _key(self, *parts):
+        return ":".join((self.prefix,) + tuple(str(p) for p in parts))
+
+    def ping(self):
+        return self._execute("PING") == "PONG"
+
+    def save_state(self, session_id, state):
+        self._execute("SET", self._key("session", session_id, "state"), json.dumps(state), "EX", self.ttl_seconds)
+
+    def load_state(self, session_id):
+        data = self._execute("GET", self._key("session", session_id, "state"))
+        return json.loads(data) if data is not None else None
+
+    def publish_event(self, session_id, text):
+        key = self._key("session", session_id, "events")
+        self._execute("RPUSH", key, json.dumps({"time": time.time(), "text": text}))
+        self._execute("EXPIRE", key, self.ttl_seconds)
+
+    def events(self, session_id, start=0):
+        items = self._execute("LRANGE", self._key("session", session_id, "events"), start, -1)
+        return [json.loads(item) for item in items]
+
+    def save_dashboard(self, session_id, dashboard):
+        self._execute("SET", self._key("session", session_id, "dashboard"), dashboard, "EX", self.ttl_seconds)
+
+    def load_dashboard(self, session_id):
+        data = self._execute("GET", self._key("session", session_id, "dashboard"))
+        return data.decode() if data is not None else None
+
+    def assign_worker(self, session_id, worker_count):
+        key = self._key("session", session_id, "worker")
+        # NX keeps the first assignment, so the session stays on its worker
+        self._execute("SET", key, pick_worker(session_id, worker_count), "NX", "EX", self.ttl_seconds)
+        return int(self._execute("GET", key))
+
+    def push_job(self, worker_index, job):
+        self._execute("RPUSH", self._key("worker", worker_index, "jobs"), json.dumps(job))
+
+    def pop_job(self, worker_index, timeout=1.0):
+        reply = self._execute("BLPOP", self._key("worker", worker_index, "jobs"), max(1, int(timeout)))
+        return json.loads(reply[1]) if reply else None
+
+    def heartbeat(self, worker_index):
+        # The key expires on its own when the worker stops refreshing it
+        self._execute("SET", self._key("worker", worker_index, "alive"), time.time(), "EX", self.heartbeat_ttl_seconds)
+
+    def worker_alive(self, worker_index):
+        return self._execute("GET", self._key("worker", worker_index, "alive")) is not None
+
+def create_session_store(url="memory://"):
+    """Session store for a URL: memory:// or redis://host:port/db"""
+    scheme = urlparse(url).scheme
+    if scheme in ("", "memory"):
+        return InMemorySessionStore()
+    if scheme == "redis":
+        return RedisSessionStore(url)
+    raise ValueError(f"Unsupported session store URL: {url}")
+
+def serve_jobs(store, worker_index, handle_job, should_stop=lambda: False):
+    """Worker loop: run each job routed to this worker until should_stop()"""
+    print(f"👷 Worker {worker_index} waiting for consultations...")
+    while not should_stop():
+        try:
+            store.heartbeat(worker_index)
+            job = store.pop_job(worker_index, timeout=1.0)
+        except (ConnectionError, OSError) as e:
+            # Store unreachable - the next pop reconnects
+            print(f"⚠️ Worker {worker_index} lost the session store: {e}")
+            time.sleep(1.0)
+            continue
+        if job is None:
+            continue
+        try:
+            handle_job(job)
+        except Exception as e:
+            print(f"❌ Worker {worker_index} job failed: {e}")
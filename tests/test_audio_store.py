@@ -0,0 +1,116 @@
+import os
+import time
+
+import pytest
+
+from audio_store import ORPHAN_GRACE_SECONDS, AudioStore
+
+RATE = 16000
+
+def frames(value, samples=100):
+    return bytes([value, 0]) * samples
+
+def stored_bytes(store, session_id, q_num):
+    stored = store.get(session_id, q_num)
+    if stored is None:
+        return None
+    view, sample_rate = stored
+    with view:
+        assert sample_rate == RATE
+        return view.tobytes()
+
+def set_mtime(root, session_id, seconds_ago):
+    moment = time.time() - seconds_ago
+    os.utime(os.path.join(root, f"{session_id}.pcm"), (moment, moment))
+
+def test_put_and_get(tmp_path):
+    store = AudioStore(str(tmp_path), budget_bytes=10_000)
+    assert store.put_frames("s1", 1, frames(1), RATE)
+    assert store.put_frames("s1", 2, frames(2), RATE)
+
+    assert stored_bytes(store, "s1", 1) == frames(1)
+    assert stored_bytes(store, "s1", 2) == frames(2)
+    assert store.has("s1", 2)
+    assert not store.has("s1", 3)
+    assert store.get("s2", 1) is None
+
+def test_empty_and_oversized_audio_are_not_stored(tmp_path):
+    store = AudioStore(str(tmp_path), budget_bytes=100)
+    assert not store.put_frames("s1", 1, b"", RATE)
+    assert not store.put_frames("s1", 1, frames(1, samples=51), RATE)
+    assert not store.has("s1", 1)
+
+def test_stored_audio_survives_a_restart(tmp_path):
+    AudioStore(str(tmp_path), budget_bytes=10_000).put_frames("s1", 4, frames(4), RATE)
+
+    store = AudioStore(str(tmp_path), budget_bytes=10_000)
+    assert stored_bytes(store, "s1", 4) == frames(4)
+    assert store.total_bytes == len(frames(4))
+
+def test_least_recently_used_session_is_evicted(tmp_path):
+    root = str(tmp_path)
+    store = AudioStore(root, budget_bytes=600)
+    for age, session_id in ((30, "old"), (20, "read"), (10, "new")):
+        store.put_frames(session_id, 1, frames(1), RATE)
+        set_mtime(root, session_id, age)
+    # Reading touches the session, so "old" is now the least recently used
+    store.get("read", 1)
+
+    assert store.put_frames("latest", 1, frames(2), RATE)
+    assert not store.has("old", 1)
+    assert store.has("read", 1) and store.has("new", 1) and store.has("latest", 1)
+    assert store.total_bytes <= 600
+
+def test_sharing_a_directory_between_stores(tmp_path):
+    writer = AudioStore(str(tmp_path), budget_bytes=10_000)
+    reader = AudioStore(str(tmp_path), budget_bytes=10_000)
+    writer.put_frames("s1", 1, frames(1), RATE)
+    assert stored_bytes(reader, "s1", 1) == frames(1)
+
+    # The reader picks up answers appended after it first looked
+    writer.put_frames("s1", 2, frames(2), RATE)
+    assert stored_bytes(reader, "s1", 2) == frames(2)
+
+    reader.drop_session("s1")
+    assert not writer.has("s1", 1)
+
+def test_mapped_segments_are_bounded(tmp_path):
+    store = AudioStore(str(tmp_path), budget_bytes=100_000, max_open_segments=3)
+    for i in range(20):
+        store.put_frames(f"s{i}", 1, frames(i), RATE)
+        assert stored_bytes(store, f"s{i}", 1) == frames(i)
+    assert sum(1 for segment in store._sessions.values() if segment.is_mapped) <= 3
+
+    # Unmapped sessions are mapped again on demand
+    assert stored_bytes(store, "s0", 1) == frames(0)
+
+@pytest.mark.skipif(not os.path.isdir("/proc/self/fd"), reason="needs /proc to count open files")
+def test_open_files_do_not_grow_with_sessions(tmp_path):
+    store = AudioStore(str(tmp_path), budget_bytes=1_000_000, max_open_segments=4)
+    before = len(os.listdir("/proc/self/fd"))
+    for i in range(200):
+        store.put_frames(f"s{i}", 1, frames(i % 256), RATE)
+        store.get(f"s{i}", 1)
+    assert len(os.listdir("/proc/self/fd")) - before <= 4
+
+def test_unindexed_segment_is_left_for_its_writer(tmp_path):
+    root = str(tmp_path)
+    # Another process has written its first answer but not its index yet
+    pcm_path = os.path.join(root, "writing.pcm")
+    with open(pcm_path, "wb") as f:
+        f.write(frames(7))
+
+    store = AudioStore(root, budget_bytes=10_000)
+    assert not store.has("writing", 1)
+    assert store.get("writing", 1) is None
+    with open(pcm_path, "rb") as f:
+        assert f.read() == frames(7)
+
+def test_old_unindexed_segment_is_removed(tmp_path):
+    root = str(tmp_path)
+    with open(os.path.join(root, "crashed.pcm"), "wb") as f:
+        f.write(frames(7))
+    set_mtime(root, "crashed", ORPHAN_GRACE_SECONDS + 60)
+
+    AudioStore(root, budget_bytes=10_000).has("crashed", 1)
+    assert not os.path.exists(os.path.join(root, "crashed.pcm"))
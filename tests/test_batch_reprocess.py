@@ -0,0 +1,39 @@
+import json
+import os
+
+from audio_store import AudioStore, read_session
+from batch_reprocess import find_consultations, read_archive_record
+
+def write_archive(path, records, partial=b""):
+    with open(path, "wb") as f:
+        for record in records:
+            f.write((json.dumps(record) + "\n").encode("utf-8"))
+        f.write(partial)
+
+def test_finds_sessions_from_audio_and_archive(tmp_path):
+    audio_dir = str(tmp_path / "audio")
+    archive_path = str(tmp_path / "archive.jsonl")
+    store = AudioStore(audio_dir, budget_bytes=10_000)
+    store.put_frames("both", 1, b"\x01\x00" * 10, 16000)
+    store.put_frames("audio-only", 1, b"\x02\x00" * 10, 16000)
+    write_archive(archive_path, [
+        {"session_id": "both", "answers": {"1": "old"}},
+        {"session_id": "archive-only", "answers": {"2": "teacher"}},
+        {"session_id": "both", "answers": {"1": "latest"}},
+    ], partial=b'{"session_id": "being-writ')
+
+    consultations = dict(find_consultations(audio_dir, archive_path))
+    assert sorted(consultations) == ["archive-only", "audio-only", "both"]
+    assert consultations["audio-only"] is None
+    assert read_archive_record(archive_path, consultations["both"])["answers"] == {"1": "latest"}
+    assert read_archive_record(archive_path, consultations["archive-only"])["answers"] == {"2": "teacher"}
+
+def test_reading_a_session_leaves_the_store_untouched(tmp_path):
+    audio_dir = str(tmp_path)
+    AudioStore(audio_dir, budget_bytes=10_000).put_frames("s1", 2, b"\x03\x00" * 10, 16000)
+    pcm_path = os.path.join(audio_dir, "s1.pcm")
+    os.utime(pcm_path, (1_000_000, 1_000_000))
+
+    assert read_session(audio_dir, "s1") == {2: (b"\x03\x00" * 10, 16000)}
+    assert read_session(audio_dir, "missing") == {}
+    assert os.stat(pcm_path).st_mtime == 1_000_000
@@ -0,0 +1,89 @@
+import json
+
+import pytest
+
+from consultation_archive import ConsultationArchive
+
+RECORDS = [
+    {"session_id": "s1", "recorded_at": "2026-09-30T09:00:00", "quality": "GOOD",
+     "answers": {"3": "fever and sore throat", "7": "yes street food", "8": "no"},
+     "summary": "Possible viral infection"},
+    {"session_id": "s2", "recorded_at": "2026-10-01T10:00:00", "quality": "FAIR",
+     "answers": {"3": "sore back and a headache", "7": "no", "8": "yes my brother was sick"},
+     "summary": "Likely dehydration"},
+    {"session_id": "s3", "recorded_at": "2026-10-19T11:00:00", "quality": "POOR",
+     "answers": {"3": "throat is sore", "7": "yes"},
+     "summary": "Follow-up for headache"},
+]
+
+@pytest.fixture(params=["memory", "file"])
+def archive(request, tmp_path):
+    archive = ConsultationArchive(str(tmp_path / "archive.jsonl") if request.param == "file" else None)
+    for record in RECORDS:
+        archive.add(record)
+    return archive
+
+def matches(archive, query):
+    total, results = archive.search(query)
+    assert total == len(results)
+    return sorted(doc["session_id"] for doc in results)
+
+def test_term_in_any_field(archive):
+    assert matches(archive, "sore") == ["s1", "s2", "s3"]
+    assert matches(archive, "headache") == ["s2", "s3"]
+    assert matches(archive, "HEADACHE") == ["s2", "s3"]
+    assert matches(archive, "migraine") == []
+
+def test_field_scoped_terms(archive):
+    assert matches(archive, "q7:yes") == ["s1", "s3"]
+    assert matches(archive, "q8:yes") == ["s2"]
+    assert matches(archive, "q7:yes q8:no") == ["s1"]
+    assert matches(archive, "insights:headache") == ["s3"]
+    assert matches(archive, "q3:dehydration") == []
+
+def test_quoted_phrase_needs_every_term(archive):
+    assert matches(archive, 'q3:"sore throat"') == ["s1", "s3"]
+    assert matches(archive, 'q3:"sore back"') == ["s2"]
+    assert matches(archive, '"sore throat" q7:yes') == ["s1", "s3"]
+
+def test_prefixes(archive):
+    assert matches(archive, "head*") == ["s2", "s3"]
+    assert matches(archive, "q8:sick*") == ["s2"]
+    assert matches(archive, "q3:thro*") == ["s1", "s3"]
+    assert matches(archive, "zz*") == []
+
+def test_date_and_quality_filters(archive):
+    assert matches(archive, "date:2026-10-01") == ["s2"]
+    assert matches(archive, "date:2026-09-30..2026-10-01") == ["s1", "s2"]
+    assert matches(archive, "date:2026-10-02..2026-10-31") == ["s3"]
+    assert matches(archive, "sore date:2026-10-01..2026-10-31 quality:poor") == ["s3"]
+    assert matches(archive, "quality:good") == ["s1"]
+
+def test_results_are_newest_first_and_limited(archive):
+    total, results = archive.search("sore", limit=2)
+    assert total == 3
+    assert [doc["session_id"] for doc in results] == ["s3", "s2"]
+    assert archive.get(results[0]["doc_id"])["answers"]["3"] == "throat is sore"
+
+def test_unknown_field_is_rejected(archive):
+    with pytest.raises(ValueError, match="Unknown search field: symptom"):
+        archive.search("symptom:fever")
+
+def test_empty_query_matches_nothing(archive):
+    assert archive.search("") == (0, [])
+
+def test_refresh_picks_up_other_writers_and_skips_partial_lines(tmp_path):
+    path = tmp_path / "archive.jsonl"
+    archive = ConsultationArchive(str(path))
+    archive.add(RECORDS[0])
+
+    with open(path, "ab") as f:
+        f.write((json.dumps(RECORDS[1]) + "\n").encode("utf-8"))
+        partial = json.dumps(RECORDS[2]).encode("utf-8")
+        f.write(partial[:20])
+    assert len(archive) == 2
+
+    with open(path, "ab") as f:
+        f.write(partial[20:] + b"\n")
+    assert len(archive) == 3
+    assert matches(archive, "q3:throat") == ["s1", "s3"]
@@ -0,0 +1,38 @@
+from reprompt import RepromptPolicy, choose_better
+
+def result(answer, confidence=None, audio=None):
+    return {"answer": answer, "confidence": confidence, "alternatives": [], "audio": audio}
+
+def test_choose_better_prefers_captured_answer():
+    captured = result("teacher", 0.5)
+    assert choose_better(result("Could not understand", audio=b"pcm"), captured) is captured
+    assert choose_better(captured, result("No response (timeout)")) is captured
+
+def test_choose_better_prefers_higher_confidence():
+    low, high = result("fourty", 0.3), result("forty", 0.9)
+    assert choose_better(low, high) is high
+    assert choose_better(high, low) is high
+    # An unknown confidence beats a known low one
+    unknown = result("forty")
+    assert choose_better(low, unknown) is unknown
+
+def test_choose_better_keeps_audio_when_both_fail():
+    unclear = result("Could not understand", audio=b"pcm")
+    timeout = result("No response (timeout)")
+    assert choose_better(unclear, timeout) is unclear
+
+    retried = result("Could not understand", audio=b"pcm2")
+    assert choose_better(unclear, retried) is retried
+
+def test_policy_respects_budget_and_per_question_limit():
+    policy = RepromptPolicy(confidence_threshold=0.4, budget=2, max_per_question=1)
+    assert policy.should_reprompt(result("Could not understand"), retries_for_question=0)
+    assert policy.should_reprompt(result("forty", 0.2), retries_for_question=0)
+    assert not policy.should_reprompt(result("forty", 0.8), retries_for_question=0)
+    assert not policy.should_reprompt(result("Audio system error"), retries_for_question=0)
+    assert not policy.should_reprompt(result("Could not understand"), retries_for_question=1)
+
+    policy.record_reprompt()
+    policy.record_reprompt()
+    assert policy.remaining == 0
+    assert not policy.should_reprompt(result("Could not understand"), retries_for_question=0)
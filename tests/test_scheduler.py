@@ -0,0 +1,165 @@
+import threading
+import time
+
+import pytest
+
+import scheduler as scheduler_module
+from scheduler import ConsultationScheduler, FairSlots
+
+def wait_until(condition, timeout=5):
+    deadline = time.monotonic() + timeout
+    while not condition():
+        if time.monotonic() > deadline:
+            raise AssertionError("timed out")
+        time.sleep(0.01)
+
+def grant_order(slots, waiters):
+    """Session ids in the order a single busy slot is handed to the waiters"""
+    order = []
+
+    def wait_for_slot(session_id):
+        with slots.slot(session_id):
+            order.append(session_id)
+
+    slots.acquire("holder")
+    threads = []
+    for session_id in waiters:
+        thread = threading.Thread(target=wait_for_slot, args=(session_id,))
+        thread.start()
+        threads.append(thread)
+        # Queue the waiters one at a time so arrival order is known
+        wait_until(lambda: len(slots._waiting) == len(threads))
+    slots.release("holder")
+    for thread in threads:
+        thread.join(timeout=5)
+    return order
+
+def test_fair_slots_first_come_first_served():
+    slots = FairSlots("STT", 1, lambda session_id: 0)
+    assert grant_order(slots, ["a", "b", "c"]) == ["a", "b", "c"]
+
+def test_fair_slots_prefer_priority_then_fewest_grants():
+    priorities = {"urgent": 1}
+    slots = FairSlots("STT", 1, lambda session_id: priorities.get(session_id, 0))
+    for _ in range(2):
+        with slots.slot("busy"):
+            pass
+
+    assert grant_order(slots, ["busy", "quiet", "urgent"]) == ["urgent", "quiet", "busy"]
+
+def test_fair_slots_reprioritize_wakes_waiters():
+    priorities = {}
+    slots = FairSlots("LLM", 1, lambda session_id: priorities.get(session_id, 0))
+    order = []
+
+    def wait_for_slot(session_id):
+        with slots.slot(session_id):
+            order.append(session_id)
+
+    slots.acquire("holder")
+    threads = [threading.Thread(target=wait_for_slot, args=(s,)) for s in ("a", "b")]
+    for thread in threads:
+        thread.start()
+        wait_until(lambda: len(slots._waiting) == threads.index(thread) + 1)
+    priorities["b"] = 1
+    slots.reprioritize()
+    slots.release("holder")
+    for thread in threads:
+        thread.join(timeout=5)
+    assert order == ["b", "a"]
+
+def make_scheduler(**kwargs):
+    options = dict(max_active=1, max_waiting=3, questions_per_session=10,
+                   default_question_seconds=10.0, default_summary_seconds=5.0, smoothing=0.0)
+    options.update(kwargs)
+    return ConsultationScheduler(**options)
+
+def submit_all(scheduler, session_ids, started):
+    return [scheduler.submit(s, lambda s=s: started.append(s)) for s in session_ids]
+
+def test_submit_admits_queues_and_rejects():
+    scheduler = make_scheduler(max_waiting=2)
+    started = []
+    tickets = submit_all(scheduler, ["a", "b", "c", "d"], started)
+
+    assert [t["status"] for t in tickets] == ["started", "queued", "queued", "rejected"]
+    assert [t["position"] for t in tickets[1:3]] == [1, 2]
+    assert started == ["a"]
+    assert scheduler.stats["rejected"] == 1
+
+def test_finish_starts_waiting_sessions_in_order():
+    scheduler = make_scheduler()
+    started = []
+    submit_all(scheduler, ["a", "b", "c"], started)
+
+    scheduler.finish("a")
+    assert started == ["a", "b"]
+    scheduler.finish("b")
+    assert started == ["a", "b", "c"]
+    assert scheduler.snapshot()["waiting"] == 0
+
+def test_cancel_leaves_the_queue():
+    scheduler = make_scheduler()
+    started = []
+    submit_all(scheduler, ["a", "b", "c"], started)
+
+    assert scheduler.cancel("b")
+    assert not scheduler.cancel("b")
+    assert not scheduler.cancel("a")  # active, not waiting
+    scheduler.finish("a")
+    assert started == ["a", "c"]
+
+def test_boost_moves_a_waiting_session_ahead():
+    scheduler = make_scheduler()
+    started = []
+    submit_all(scheduler, ["a", "b", "c", "d"], started)
+
+    scheduler.boost("d", reason="pain 9/10")
+    scheduler.finish("a")
+    assert started == ["a", "d"]
+    scheduler.finish("d")
+    scheduler.finish("b")
+    assert started == ["a", "d", "b", "c"]
+    assert scheduler.stats["boosted"] == 1
+
+def test_wait_estimate_follows_progress_of_active_sessions():
+    scheduler = make_scheduler(max_waiting=5)
+    started = []
+    submit_all(scheduler, ["a"], started)
+
+    # 10 questions x 10s + 5s summary until "a" frees the kiosk, then a full session each
+    assert scheduler.estimate_wait(0) == pytest.approx(105.0)
+    assert scheduler.estimate_wait(1) == pytest.approx(210.0)
+
+    for _ in range(4):
+        scheduler.record_question("a", 10.0)
+    assert scheduler.estimate_wait(0) == pytest.approx(65.0)
+    assert scheduler.submit("b", lambda: None)["eta_seconds"] == pytest.approx(65.0)
+
+def test_wait_estimate_with_several_kiosks():
+    scheduler = make_scheduler(max_active=2)
+    started = []
+    submit_all(scheduler, ["a"], started)
+    # One kiosk is still free
+    assert scheduler.estimate_wait(0) == 0.0
+    assert scheduler.estimate_wait(1) == pytest.approx(105.0)
+
+def test_wait_estimate_learns_measured_durations():
+    scheduler = make_scheduler(smoothing=0.5)
+    submit_all(scheduler, ["a"], [])
+    scheduler.record_question("other", 20.0)
+    scheduler.record_summary(15.0)
+    snapshot = scheduler.snapshot()
+    assert snapshot["question_seconds"] == pytest.approx(15.0)
+    assert snapshot["summary_seconds"] == pytest.approx(10.0)
+
+def test_queue_wait_stats_stay_bounded(monkeypatch):
+    monkeypatch.setattr(scheduler_module, "QUEUE_WAIT_HISTORY", 3)
+    scheduler = make_scheduler()
+    for i in range(10):
+        scheduler.submit(f"s{i}", lambda: None)
+        scheduler.finish(f"s{i}")
+
+    assert scheduler.stats["admitted"] == 10
+    assert len(scheduler.stats["queue_waits"]) == 3
+    assert scheduler.stats["queue_wait_total"] == pytest.approx(0.0)
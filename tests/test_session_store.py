@@ -0,0 +1,185 @@
+import os
+import shutil
+import socket
+import subprocess
+import threading
+import time
+import uuid
+
+import pytest
+
+import session_store
+from session_store import InMemorySessionStore, RedisSessionStore, pick_worker, serve_jobs
+
+def _free_port():
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+@pytest.fixture(scope="session")
+def redis_url():
+    """REDIS_TEST_URL, or a throwaway redis-server if one is installed"""
+    url = os.environ.get("REDIS_TEST_URL")
+    if url:
+        yield url
+        return
+    if shutil.which("redis-server") is None:
+        pytest.skip("redis-server not installed and REDIS_TEST_URL not set")
+
+    port = _free_port()
+    server = subprocess.Popen(
+        ["redis-server", "--port", str(port), "--bind", "127.0.0.1", "--save", "", "--appendonly", "no"],
+        stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL
+    )
+    url = f"redis://127.0.0.1:{port}/0"
+    try:
+        deadline = time.monotonic() + 10
+        while True:
+            try:
+                RedisSessionStore(url).ping()
+                break
+            except OSError:
+                if time.monotonic() > deadline:
+                    pytest.skip("redis-server did not start")
+                time.sleep(0.05)
+        yield url
+    finally:
+        server.terminate()
+        server.wait(timeout=10)
+
+@pytest.fixture(params=["memory", "redis"])
+def store(request):
+    if request.param == "memory":
+        return InMemorySessionStore()
+    # A fresh key prefix per test keeps tests independent on a shared server
+    return RedisSessionStore(request.getfixturevalue("redis_url"), prefix=f"test-{uuid.uuid4().hex}")
+
+def test_state_round_trip(store):
+    assert store.load_state("s1") is None
+    state = {"session_id": "s1", "status": "running", "responses": [{"q_num": 1, "answer": "42"}]}
+    store.save_state("s1", state)
+    assert store.load_state("s1") == state
+
+    store.save_state("s1", {**state, "status": "complete"})
+    assert store.load_state("s1")["status"] == "complete"
+
+def test_dashboard_and_events(store):
+    assert store.load_dashboard("s1") is None
+    store.save_dashboard("s1", "# Dashboard 🏥")
+    assert store.load_dashboard("s1") == "# Dashboard 🏥"
+
+    store.publish_event("s1", "Question 1/10")
+    store.publish_event("s1", "Question 2/10")
+    assert [e["text"] for e in store.events("s1")] == ["Question 1/10", "Question 2/10"]
+    assert [e["text"] for e in store.events("s1", start=1)] == ["Question 2/10"]
+
+def test_assign_worker_is_sticky(store):
+    first = store.assign_worker("s1", 4)
+    assert first == pick_worker("s1", 4)
+    # A later call with another worker count keeps the first assignment
+    assert store.assign_worker("s1", 7) == first
+    assert store.assign_worker("s2", 7) == pick_worker("s2", 7)
+
+def test_job_queue_is_fifo_per_worker(store):
+    store.push_job(0, {"action": "start", "session_id": "s1"})
+    store.push_job(0, {"action": "stop", "session_id": "s1"})
+    store.push_job(1, {"action": "start", "session_id": "s2"})
+
+    assert store.pop_job(0) == {"action": "start", "session_id": "s1"}
+    assert store.pop_job(0) == {"action": "stop", "session_id": "s1"}
+    assert store.pop_job(1) == {"action": "start", "session_id": "s2"}
+    assert store.pop_job(0, timeout=1) is None
+
+def test_pop_job_waits_for_a_push(store):
+    timer = threading.Timer(0.2, store.push_job, args=(0, {"action": "start", "session_id": "s1"}))
+    timer.start()
+    try:
+        assert store.pop_job(0, timeout=5) == {"action": "start", "session_id": "s1"}
+    finally:
+        timer.join()
+
+def test_serve_jobs_runs_each_job(store):
+    handled = []
+    for i in range(3):
+        store.push_job(2, {"action": "start", "session_id": f"s{i}"})
+
+    serve_jobs(store, 2, lambda job: handled.append(job["session_id"]), should_stop=lambda: len(handled) == 3)
+    assert handled == ["s0", "s1", "s2"]
+
+class _FailingConnection:
+    def __init__(self, error):
+        self.error = error
+        self.sent = []
+
+    def execute(self, *args):
+        self.sent.append(args)
+        raise self.error
+
+    def close(self):
+        pass
+
+class _Connection:
+    def __init__(self, *args):
+        self.sent = []
+
+    def execute(self, *args):
+        self.sent.append(args)
+        return "OK"
+
+@pytest.mark.parametrize("command, error, retried", [
+    ("GET", ConnectionError("closed"), True),
+    ("SET", OSError("reset"), True),
+    ("RPUSH", ConnectionError("closed"), False),
+    ("BLPOP", OSError("reset"), False),
+    ("RPUSH", session_store._NotSentError("broken pipe"), True),
+])
+def test_reconnect_resends_only_safe_commands(monkeypatch, command, error, retried):
+    monkeypatch.setattr(session_store, "_RedisConnection", _Connection)
+    store = RedisSessionStore("redis://127.0.0.1:1/0")
+    store._local.conn = _FailingConnection(error)
+
+    if retried:
+        assert store._execute(command, "key") == "OK"
+        assert store._local.conn.sent == [(command, "key")]
+    else:
+        with pytest.raises(type(error)):
+            store._execute(command, "key")
+        assert store._local.conn is None
+
+def test_worker_alive_follows_heartbeats(store):
+    store.heartbeat_ttl_seconds = 1
+    assert not store.worker_alive(3)
+    store.heartbeat(3)
+    assert store.worker_alive(3)
+    assert not store.worker_alive(4)
+
+    time.sleep(1.2)
+    assert not store.worker_alive(3)
+
+def test_serve_jobs_sends_heartbeats(store):
+    serve_jobs(store, 5, lambda job: None, should_stop=lambda: store.worker_alive(5))
+    assert store.worker_alive(5)
+
+def test_sessions_expire_after_ttl(store):
+    store.ttl_seconds = 1
+    store.save_state("old", {"status": "complete"})
+    store.save_dashboard("old", "# Dashboard")
+    store.publish_event("old", "Question 1/10")
+
+    time.sleep(1.2)
+    store.save_state("new", {"status": "running"})
+    assert store.load_state("old") is None
+    assert store.load_dashboard("old") is None
+    assert store.events("old") == []
+    assert store.load_state("new") == {"status": "running"}
+
+def test_expired_sessions_are_pruned_from_memory():
+    store = InMemorySessionStore(ttl_seconds=0.2)
+    for i in range(50):
+        store.save_state(f"s{i}", {"status": "complete"})
+        store.publish_event(f"s{i}", "done")
+    time.sleep(0.3)
+    store.save_state("latest", {"status": "running"})
+
+    assert list(store._states) == ["latest"]
+    assert not store._events and not store._dashboards
@@ -0,0 +1,24 @@
+import pytest
+
+from triage import parse_pain_severity
+
+@pytest.mark.parametrize("answer, expected", [
+    ("7", 7),
+    ("10", 10),
+    ("eight", 8),
+    ("maybe a five", 5),
+    ("7 out of 10", 7),
+    ("about 6/10", 6),
+    ("ten out of ten", 10),
+    ("I've had it 3 days, pain is 9", 9),
+    ("for two weeks now and it's about a 6", 6),
+    ("on a scale of 1 to 10 it's a 4", 4),
+    ("the pain level is around 3 but 2 hours ago it was worse", 3),
+    ("somewhere between 3 and 5", 5),
+])
+def test_parse_pain_severity(answer, expected):
+    assert parse_pain_severity(answer) == expected
+
+@pytest.mark.parametrize("answer", ["", "no pain", "it hurts a lot", "15", "Could not understand"])
+def test_parse_pain_severity_without_rating(answer):
+    assert parse_pain_severity(answer) is None
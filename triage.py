@@ -0,0 +1,40 @@
+"""
+Red-flag parsing of spoken triage answers.
+
+Answers to the pain question are free speech: "seven", "about a 6 out of
+10", "I've had it 3 days and the pain is 9". parse_pain_severity() picks
+the number that is the severity rather than the first number mentioned:
+
+1. number words are read as digits and durations ("3 days") are ignored,
+   as is a repeated scale ("1 to 10")
+2. a rating against the scale ("7 out of 10", "7/10") wins
+3. then a number right after "pain", "severity", "level" or "rating"
+4. otherwise the highest 1-10 value mentioned
+"""
+import re
+
+NUMBER_WORDS = {
+    "one": 1, "two": 2, "three": 3, "four": 4, "five": 5,
+    "six": 6, "seven": 7, "eight": 8, "nine": 9, "ten": 10
+}
+
+_NUMBER_WORD_RE = re.compile(r"\b(" + "|".join(NUMBER_WORDS) + r")\b")
+_DURATION_RE = re.compile(r"\b\d+\s*(?:more\s+)?(?:seconds?|minutes?|mins?|hours?|hrs?|days?|nights?|weeks?|months?|years?)\b")
+_SCALE_RE = re.compile(r"\b(?:1|one)\s*(?:to|-)\s*10\b")
+_OUT_OF_TEN_RE = re.compile(r"\b(10|[1-9])\s*(?:out of|/|over)\s*10\b")
+_AFTER_KEYWORD_RE = re.compile(r"\b(?:pain|severity|level|rating|rate it)\b[^\d]{0,15}?\b(10|[1-9])\b")
+_SEVERITY_RE = re.compile(r"\b(10|[1-9])\b")
+
+def parse_pain_severity(answer):
+    """Extract a 1-10 pain severity from a spoken answer, or None"""
+    text = _NUMBER_WORD_RE.sub(lambda m: str(NUMBER_WORDS[m.group(1)]), answer.lower())
+    text = _DURATION_RE.sub(" ", text)
+    text = _SCALE_RE.sub(" ", text)
+
+    for pattern in (_OUT_OF_TEN_RE, _AFTER_KEYWORD_RE):
+        match = pattern.search(text)
+        if match:
+            return int(match.group(1))
+
+    values = [int(v) for v in _SEVERITY_RE.findall(text)]
+    return max(values) if values else None